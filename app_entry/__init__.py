@@ -4,14 +4,19 @@
 """KUCCPS Course Checker API - Application Factory"""
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
+import asyncio
+import httpx
 import logging
 
 from app_entry.core.config import settings
 from app_entry.core.cache import CourseCache
-from app_entry.core import globals as app_globals
+from app_entry.core.indexes import ensure_indexes
+from app_entry.core.writer import BackgroundWriter
+from app_entry.utils.grade_checker_nb import warm_up
 from app_entry.api.routes import router as api_router
 
 # Configure logging
@@ -23,17 +28,60 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Application startup and shutdown"""
+    """Application startup and shutdown
+
+    The client, its database handles, cache, writer and Paystack client live on
+    app.state, where the dependencies in app_entry.core.dependencies read them
+    from the request.
+    """
     # Startup
     try:
         logger.info("Starting application...")
-        app_globals.client = AsyncIOMotorClient(settings.MONGO_URI)
+        app.state.client = AsyncMongoClient(
+            settings.MONGO_URI,
+            maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+            minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+            maxIdleTimeMS=settings.MONGO_MAX_IDLE_TIME_MS,
+            serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS
+        )
+        # Force server selection and the handshake now rather than on the first request
+        await app.state.client.admin.command("ping")
+        # Database handles for get_db_by_name, built once instead of per request
+        app.state.dbs = {
+            name: app.state.client[name]
+            for name in (settings.DEGREE_DB, settings.DP_COURSES_DB, settings.CERT_COURSES_DB,
+                         settings.KMTC_COURSES_DB, settings.PAYMENTS_DB)
+        }
 
         # Initialize cache
-        app_globals.cache = CourseCache(app_globals.client, ttl_hours=settings.CACHE_TTL_HOURS)
-        await app_globals.cache.initialize()
+        app.state.cache = CourseCache(
+            app.state.client,
+            ttl_hours=settings.CACHE_TTL_HOURS,
+            response_cache_size=settings.RESPONSE_CACHE_MAX_SIZE,
+            snapshot_path=settings.CACHE_SNAPSHOT_PATH
+        )
+        await app.state.cache.initialize()
+        # JIT the filter kernel now so the first request doesn't pay for it
+        await asyncio.to_thread(warm_up)
+
+        # Make sure hot-path queries are index lookups
+        await ensure_indexes(app.state.client)
+
+        # Start background writer for non-critical writes
+        app.state.writer = BackgroundWriter(
+            batch_size=settings.WRITE_BATCH_SIZE,
+            flush_interval_ms=settings.WRITE_FLUSH_INTERVAL_MS,
+            max_queue_size=settings.WRITE_QUEUE_MAX_SIZE
+        )
+        await app.state.writer.start()
 
-        logger.info("✓ Database client and cache initialized successfully")
+        # One pooled client so payment verifications reuse a keep-alive TLS connection
+        app.state.paystack = httpx.AsyncClient(
+            base_url=settings.PAYSTACK_API_URL,
+            headers={"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"}
+        )
+
+        logger.info("✓ Database client, cache and writer initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize database client: {e}")
         raise
@@ -42,8 +90,27 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     try:
-        if app_globals.client:
-            app_globals.client.close()
+        if getattr(app.state, "cache", None):
+            await app.state.cache.close()
+    except Exception as e:
+        logger.error(f"Error stopping cache refresh: {e}")
+
+    try:
+        # Drain queued writes before the client goes away
+        if getattr(app.state, "writer", None):
+            await app.state.writer.stop()
+    except Exception as e:
+        logger.error(f"Error draining background writer: {e}")
+
+    try:
+        if getattr(app.state, "paystack", None):
+            await app.state.paystack.aclose()
+    except Exception as e:
+        logger.error(f"Error closing Paystack client: {e}")
+
+    try:
+        if getattr(app.state, "client", None):
+            await app.state.client.close()
             logger.info("✓ Database client closed")
     except Exception as e:
         logger.error(f"Error closing database client: {e}")
@@ -56,6 +123,7 @@ def create_app() -> FastAPI:
         version=settings.API_VERSION,
         docs_url="/api/docs",
         openapi_url="/api/openapi.json",
+        default_response_class=ORJSONResponse,
         lifespan=lifespan
     )
 
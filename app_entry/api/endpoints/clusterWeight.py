@@ -4,19 +4,37 @@
 """Cluster Weight Calculator payment endpoints"""
 
 from fastapi import APIRouter, HTTPException, status, Query, Depends
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 from datetime import datetime
 import logging
-from typing import Dict, Optional
+import time
+from typing import Dict, Optional, Tuple
 from pydantic import BaseModel, EmailStr, Field
+from pydantic.networks import validate_email
 
-from app_entry.core import globals as app_globals
 from app_entry.core.config import settings
 from app_entry.core.dependencies import get_db_by_name
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Every verify-cluster request must carry exactly these cluster weights
+_EXPECTED_CLUSTERS = frozenset(f"cl{i}" for i in range(1, 21))
+
+# Only the fields UserClusterWeightsResponse needs - no _id, amount, status
+_WEIGHTS_PROJECTION = {
+    "_id": 0, "reference": 1, "email": 1, "kcse_overall": 1,
+    "cluster_weights": 1, "product": 1, "timestamp": 1
+}
+
+# email -> (monotonic expiry, response); weights only change on verify-cluster,
+# which primes its user's entry (per worker - others may lag by the TTL)
+_cluster_cache: Dict[str, Tuple[float, "UserClusterWeightsResponse"]] = {}
+
+# email -> number of verify-cluster saves, so a GET that read the record before
+# a save can't cache its stale response over the primed one
+_cluster_versions: Dict[str, int] = {}
+
 # ==================== REQUEST SCHEMAS ====================
 
 class VerifyClusterPaymentRequest(BaseModel):
@@ -49,10 +67,62 @@ class UserClusterWeightsResponse(BaseModel):
     timestamp: str = Field(..., description="When the weights were calculated")
 
 
+# ==================== CLUSTER WEIGHTS CACHE ====================
+
+def _cache_key(email: str) -> str:
+    """`email` normalised the way EmailStr normalises verify-cluster's, so both share an entry"""
+    try:
+        return validate_email(email)[1]
+    except ValueError:
+        return email
+
+
+def _weights_response(record: Dict) -> UserClusterWeightsResponse:
+    """Build the response for a stored cluster_weights record"""
+    # Convert timestamp to ISO format string
+    timestamp_str = record["timestamp"].isoformat() if isinstance(record["timestamp"], datetime) else str(record["timestamp"])
+    return UserClusterWeightsResponse(
+        reference=record.get("reference", ""),
+        email=record.get("email"),
+        kcse_overall=record.get("kcse_overall"),
+        cluster_weights=record.get("cluster_weights", {}),
+        product=record.get("product", "cluster_weight_calculator"),
+        timestamp=timestamp_str
+    )
+
+
+def _get_cached_weights(email: str) -> Optional[UserClusterWeightsResponse]:
+    """Return the cached response for `email` if it hasn't expired"""
+    entry = _cluster_cache.get(email)
+    if entry is None:
+        return None
+    expires_at, response = entry
+    if expires_at < time.monotonic():
+        _cluster_cache.pop(email, None)
+        return None
+    return response
+
+
+def _cache_weights(email: str, response: UserClusterWeightsResponse, version: int) -> None:
+    """Cache a response read at `version`, evicting the oldest entry when full
+
+    Dropped if verify-cluster saved new weights for `email` since then.
+    """
+    if _cluster_versions.get(email, 0) != version:
+        return
+    _cluster_cache.pop(email, None)
+    _cluster_cache[email] = (time.monotonic() + settings.CLUSTER_WEIGHTS_CACHE_TTL_SECONDS, response)
+    if len(_cluster_cache) > settings.CLUSTER_WEIGHTS_CACHE_MAX_SIZE:
+        _cluster_cache.pop(next(iter(_cluster_cache)))
+
+
 # ==================== VERIFY CLUSTER WEIGHT PAYMENT ====================
 
 @router.post("/verify-cluster", response_model=VerifyClusterPaymentResponse)
-async def verify_cluster_payment(request: VerifyClusterPaymentRequest) -> VerifyClusterPaymentResponse:
+async def verify_cluster_payment(
+    request: VerifyClusterPaymentRequest,
+    payments_db: AsyncDatabase = Depends(get_db_by_name(settings.PAYMENTS_DB))
+) -> VerifyClusterPaymentResponse:
     """
     Verify cluster weight calculator payment and save results
     
@@ -80,12 +150,13 @@ async def verify_cluster_payment(request: VerifyClusterPaymentRequest) -> Verify
         logger.info(f"🔄 Verifying cluster payment for: {request.email} (Ref: {request.reference})")
 
         # Validate that we have all 20 clusters
-        expected_clusters = {f"cl{i}" for i in range(1, 21)}
-        provided_clusters = set(request.cluster_weights.keys())
+        provided = request.cluster_weights.keys()
         
-        if provided_clusters != expected_clusters:
-            missing = expected_clusters - provided_clusters
-            extra = provided_clusters - expected_clusters
+        # Dict keys are unique, so equal size + subset means exactly the expected keys
+        if len(provided) != len(_EXPECTED_CLUSTERS) or not _EXPECTED_CLUSTERS.issuperset(provided):
+            provided_clusters = set(provided)
+            missing = set(_EXPECTED_CLUSTERS) - provided_clusters
+            extra = provided_clusters - _EXPECTED_CLUSTERS
             error_msg = f"Invalid clusters. "
             if missing:
                 error_msg += f"Missing: {missing}. "
@@ -105,16 +176,12 @@ async def verify_cluster_payment(request: VerifyClusterPaymentRequest) -> Verify
                 detail="Invalid product type"
             )
 
-        # Get the payments database dynamically
-        if not app_globals.client:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Database client unavailable"
-            )
-        
-        payments_db = app_globals.client[settings.PAYMENTS_DB]
         cluster_weights_collection = payments_db["cluster_weights"]
 
+        # Mongo keeps milliseconds - truncate so the primed response matches a later read
+        now = datetime.utcnow()
+        now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+
         # Save cluster weights to database
         cluster_record = {
             "reference": request.reference,
@@ -124,16 +191,19 @@ async def verify_cluster_payment(request: VerifyClusterPaymentRequest) -> Verify
             "product": request.product,
             "status": "success",
             "amount_kes": 50,
-            "timestamp": datetime.utcnow()
+            "timestamp": now
         }
         
         result = await cluster_weights_collection.insert_one(cluster_record)
         logger.info(f"✓ Saved cluster weights to database: {result.inserted_id}")
 
-        # Log cluster weights for reference
-        logger.info(f"📊 Cluster weights for {request.email}:")
-        for cluster_id in sorted(request.cluster_weights.keys()):
-            logger.info(f"  {cluster_id}: {request.cluster_weights[cluster_id]}")
+        # The new record is the user's latest - serve it without a read
+        cache_key = _cache_key(request.email)
+        version = _cluster_versions[cache_key] = _cluster_versions.get(cache_key, 0) + 1
+        _cache_weights(cache_key, _weights_response(cluster_record), version)
+
+        # Full weights are in the saved record; lazy formatting keeps this free at INFO
+        logger.debug("📊 Cluster weights for %s: %s", request.email, request.cluster_weights)
 
         logger.info(f"✅ Cluster payment verification complete for {request.email}")
 
@@ -158,7 +228,10 @@ async def verify_cluster_payment(request: VerifyClusterPaymentRequest) -> Verify
 # ==================== GET USER CLUSTER WEIGHTS ====================
 
 @router.get("/user-cluster-weights", response_model=UserClusterWeightsResponse)
-async def get_user_cluster_weights(email: str = Query(..., description="User email to retrieve weights for")) -> UserClusterWeightsResponse:
+async def get_user_cluster_weights(
+    email: str = Query(..., description="User email to retrieve weights for"),
+    payments_db: AsyncDatabase = Depends(get_db_by_name(settings.PAYMENTS_DB))
+) -> UserClusterWeightsResponse:
     """
     Retrieve stored cluster weights for a user
     
@@ -173,18 +246,20 @@ async def get_user_cluster_weights(email: str = Query(..., description="User ema
     try:
         logger.info(f"📊 Retrieving cluster weights for: {email}")
 
-        if not app_globals.client:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Database client unavailable"
-            )
-        
-        payments_db = app_globals.client[settings.PAYMENTS_DB]
+        cache_key = _cache_key(email)
+        cached = _get_cached_weights(cache_key)
+        if cached is not None:
+            logger.info(f"✓ Retrieved cluster weights for {email} (cached)")
+            return cached
+
+        # Taken before the read, so a verify-cluster save during it wins
+        version = _cluster_versions.get(cache_key, 0)
         cluster_weights_collection = payments_db["cluster_weights"]
 
         # Get the most recent record for this user
         record = await cluster_weights_collection.find_one(
             {"email": email, "status": "success"},
+            projection=_WEIGHTS_PROJECTION,
             sort=[("timestamp", -1)]
         )
 
@@ -195,22 +270,11 @@ async def get_user_cluster_weights(email: str = Query(..., description="User ema
                 detail=f"No cluster weight records found for email: {email}"
             )
 
-        # Remove MongoDB's ObjectId for JSON serialization
-        record.pop("_id", None)
-        
-        # Convert timestamp to ISO format string
-        timestamp_str = record["timestamp"].isoformat() if isinstance(record["timestamp"], datetime) else str(record["timestamp"])
-
         logger.info(f"✓ Retrieved cluster weights for {email}")
         
-        return UserClusterWeightsResponse(
-            reference=record.get("reference", ""),
-            email=record.get("email"),
-            kcse_overall=record.get("kcse_overall"),
-            cluster_weights=record.get("cluster_weights", {}),
-            product=record.get("product", "cluster_weight_calculator"),
-            timestamp=timestamp_str
-        )
+        response = _weights_response(record)
+        _cache_weights(cache_key, response, version)
+        return response
 
     except HTTPException:
         raise
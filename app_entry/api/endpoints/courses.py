@@ -4,21 +4,28 @@
 """Course checking endpoints - with multi-step qualification & basket management"""
 
 from fastapi import APIRouter, HTTPException, status, Depends, Query
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pymongo.asynchronous.database import AsyncDatabase
 from datetime import datetime
+from functools import lru_cache
+from operator import itemgetter
+import asyncio
 import logging
-from typing import List, Dict
+from typing import Any, AsyncIterator, Callable, List, Dict, Optional, Tuple
+import orjson
 from pydantic import BaseModel, EmailStr, Field
+from pymongo import InsertOne, UpdateOne
 
 from app_entry.schemas.education import (
-    CourseCheckRequest, CourseCheckResponse, EducationType,
-    ClusterResult, Programme
+    CourseCheckRequest, CourseCheckResponse, EducationType
 )
 from app_entry.core.cache import CourseCache
-from app_entry.core.dependencies import get_db_by_name, get_cache
+from app_entry.core.dependencies import get_db_by_name, get_cache, get_writer
+from app_entry.core.writer import BackgroundWriter
 from app_entry.core.config import settings
 from app_entry.utils.grade_checker import GradeChecker
-from app_entry.utils.validators import validate_subjects
+from app_entry.utils.programme_index import ProgrammeIndex
+from app_entry.utils.validators import SubjectPairs, subject_pair, validate_subject_pairs
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -65,158 +72,199 @@ class UserBasketResponse(BaseModel):
     total_items: int
     last_updated: str
 
-def _safe_programme(p: dict) -> dict:
-    """Safely extract programme data, handling MongoDB ObjectIds and other issues"""
-    try:
-        # Handle minimum_grade - it's a dict like {'mean_grade': 'D'}
-        min_grade = p.get("minimum_grade", {})
-        if isinstance(min_grade, dict):
-            grade_value = min_grade.get("mean_grade", "")
-        else:
-            grade_value = str(min_grade) if min_grade else None
-        
-        return {
-            "institution_name": str(p.get("institution_name", "")),
-            "programme_name": str(p.get("programme_name", "")),
-            "programme_code": str(p.get("programme_code", "")) if p.get("programme_code") else None,
-            "cut_off_points": float(p.get("cut_off_points", 0.0)) if p.get("cut_off_points") else None,
-            "minimum_grade": grade_value,
-            "minimum_subject_requirements": p.get("minimum_subject_requirements", {}) if isinstance(p.get("minimum_subject_requirements"), dict) else {}
-        }
-    except Exception as e:
-        logger.error(f"Error converting programme: {e}")
-        return {
-            "institution_name": "",
-            "programme_name": "",
-            "programme_code": None,
-            "cut_off_points": None,
-            "minimum_grade": None,
-            "minimum_subject_requirements": {}
-        }
+@lru_cache(maxsize=4096)
+def _normalize_grades(pairs: SubjectPairs) -> Tuple[Dict[str, str], Optional[str]]:
+    """Build the grade dict (subjects are lowercased by SubjectGrade) and pick out the overall grade
+
+    Memoised per distinct payload (retries repeat it); callers must not mutate
+    the returned dict.
+    """
+    grade_dict = {subject: grade for subject, grade in pairs}
+    # Overall grade is required; like any repeated subject, the last one wins
+    return grade_dict, grade_dict.get("overall")
 
 # ============================================================================
 # Helper functions for checking each programme type
 # ============================================================================
 
-async def _check_degree(checker: GradeChecker, min_grade: str, cache: CourseCache) -> List[ClusterResult]:
-    """Check degree programmes with cut-off points validation"""
-    results = []
-    for cluster_no in range(1, 21):
-        try:
-            programmes = cache.get_degree_cluster(cluster_no)
-            qualified = []
-            for p in programmes:
-                try:
-                    # Pass cluster number for cut-off points check
-                    if checker.check_programme_requirements(p, min_grade, cluster_number=str(cluster_no)):
-                        safe_p = _safe_programme(p)
-                        qualified.append(Programme(**safe_p))
-                except Exception as e:
-                    logger.warning(f"Error checking programme {p.get('programme_name')}: {e}")
-                    continue
-            
-            if qualified:
-                results.append(ClusterResult(
-                    cluster_name=f"cluster_{cluster_no}",
-                    programmes=qualified
-                ))
-                logger.info(f"✓ Cluster {cluster_no}: {len(qualified)} qualified programmes")
-        except Exception as e:
-            logger.error(f"Error checking cluster {cluster_no}: {e}")
-            continue
-    return results
+def _filter_cluster_sync(
+    index: ProgrammeIndex,
+    checker: GradeChecker,
+    min_grade: str,
+    cluster_number: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Filter one cluster/category down to the programmes the user qualifies for
 
-async def _check_diploma(checker: GradeChecker, min_grade: str, cache: CourseCache) -> List[ClusterResult]:
-    """Check diploma programmes"""
-    results = []
-    for category in cache.DIPLOMA_CATEGORIES:
-        try:
-            programmes = cache.get_diploma_category(category)
-            qualified = []
-            for p in programmes:
-                try:
-                    if checker.check_programme_requirements(p, min_grade):
-                        safe_p = _safe_programme(p)
-                        qualified.append(Programme(**safe_p))
-                except Exception as e:
-                    logger.warning(f"Error checking programme {p.get('programme_name')}: {e}")
-                    continue
-            
-            if qualified:
-                results.append(ClusterResult(
-                    cluster_name=category,
-                    programmes=qualified
-                ))
-                logger.info(f"✓ Diploma {category}: {len(qualified)} qualified programmes")
-        except Exception as e:
-            logger.error(f"Error checking category {category}: {e}")
-            continue
-    return results
+    Pure CPU work with no awaits - run it via asyncio.to_thread so the event
+    loop stays free while the check runs.
+    """
+    qualified = []
+    for i in checker.check_index(index, min_grade, cluster_number=cluster_number):
+        # Dumped once at cache load; None marks a programme that failed validation
+        dumped = index.programmes[i]["_dump"]
+        if dumped is not None:
+            qualified.append(dumped)
+    return qualified
+
+# (cluster/category name, its index, cluster number for the cut-off check)
+Target = Tuple[str, ProgrammeIndex, Optional[str]]
+
+async def _iter_checked(
+    checker: GradeChecker,
+    min_grade: str,
+    targets: List[Target],
+    label: str
+) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """Filter every (name, index, cluster_number) target concurrently
+
+    cluster_number is only set for degree clusters, where it enables the
+    cut-off points check. Yields (target position, ClusterResult-shaped dict
+    built from the cached programme dumps) as each target finishes; failed
+    and empty targets are skipped. At most CHECK_MAX_CONCURRENCY targets are
+    in the threadpool at once, so one degree check can't crowd out the rest.
+    """
+    semaphore = asyncio.Semaphore(settings.CHECK_MAX_CONCURRENCY)
 
-async def _check_certificate(checker: GradeChecker, min_grade: str, cache: CourseCache) -> List[ClusterResult]:
-    """Check certificate programmes"""
-    results = []
-    for category in cache.CERT_CATEGORIES:
+    async def run(position: int, target: Target) -> Tuple[int, str, Any]:
+        name, index, cluster_number = target
         try:
-            programmes = cache.get_cert_category(category)
-            qualified = []
-            for p in programmes:
-                try:
-                    if checker.check_programme_requirements(p, min_grade):
-                        safe_p = _safe_programme(p)
-                        qualified.append(Programme(**safe_p))
-                except Exception as e:
-                    logger.warning(f"Error checking programme {p.get('programme_name')}: {e}")
-                    continue
-            
-            if qualified:
-                results.append(ClusterResult(
-                    cluster_name=category,
-                    programmes=qualified
-                ))
-                logger.info(f"✓ Cert {category}: {len(qualified)} qualified programmes")
+            async with semaphore:
+                qualified = await asyncio.to_thread(_filter_cluster_sync, index, checker, min_grade, cluster_number)
         except Exception as e:
-            logger.error(f"Error checking category {category}: {e}")
-            continue
-    return results
+            qualified = e
+        return position, name, qualified
 
-async def _check_kmtc(checker: GradeChecker, min_grade: str, cache: CourseCache) -> List[ClusterResult]:
-    """Check KMTC programmes"""
-    results = []
-    for category in cache.KMTC_CATEGORIES:
-        try:
-            programmes = cache.get_kmtc()
-            qualified = []
-            for p in programmes:
-                try:
-                    if checker.check_programme_requirements(p, min_grade):
-                        safe_p = _safe_programme(p)
-                        qualified.append(Programme(**safe_p))
-                except Exception as e:
-                    logger.warning(f"Error checking programme {p.get('programme_name')}: {e}")
-                    continue
-            
-            if qualified:
-                results.append(ClusterResult(
-                    cluster_name=category,
-                    programmes=qualified
-                ))
-                logger.info(f"✓ KMTC {category}: {len(qualified)} qualified programmes")
-        except Exception as e:
-            logger.error(f"Error checking category {category}: {e}")
+    for finished in asyncio.as_completed([run(i, t) for i, t in enumerate(targets)]):
+        position, name, qualified = await finished
+        if isinstance(qualified, Exception):
+            logger.error(f"Error checking {label} {name}: {qualified}")
             continue
-    return results
+        if qualified:
+            logger.info(f"✓ {label} {name}: {len(qualified)} qualified programmes")
+            yield position, {
+                "cluster_name": name,
+                "programmes": qualified
+            }
+
+async def _check(
+    checker: GradeChecker,
+    min_grade: str,
+    targets: List[Target],
+    label: str
+) -> List[Dict[str, Any]]:
+    """Filter all targets and return the non-empty results in target order"""
+    found = [item async for item in _iter_checked(checker, min_grade, targets, label)]
+    found.sort(key=itemgetter(0))
+    return [cluster for _, cluster in found]
+
+def _degree_targets(cache: CourseCache) -> List[Target]:
+    """Degree clusters - pass cluster number for cut-off points check"""
+    return [(f"cluster_{i}", cache.get_degree_index(i), str(i)) for i in range(1, 21)]
+
+def _diploma_targets(cache: CourseCache) -> List[Target]:
+    """Diploma categories"""
+    return [(c, cache.get_diploma_index(c), None) for c in cache.DIPLOMA_CATEGORIES]
+
+def _cert_targets(cache: CourseCache) -> List[Target]:
+    """Certificate categories"""
+    return [(c, cache.get_cert_index(c), None) for c in cache.CERT_CATEGORIES]
+
+def _kmtc_targets(cache: CourseCache) -> List[Target]:
+    """KMTC programmes"""
+    return [(c, cache.get_kmtc_index(c), None) for c in cache.KMTC_CATEGORIES]
+
+# Education type -> (log message, result label, targets builder)
+_DISPATCH: Dict[EducationType, Tuple[str, str, Callable[[CourseCache], List[Target]]]] = {
+    EducationType.DEGREE: ("🎓 Running DEGREE qualification logic with cut-off points", "Cluster", _degree_targets),
+    EducationType.DIPLOMA: ("📚 Running DIPLOMA qualification logic", "Diploma", _diploma_targets),
+    EducationType.CERTIFICATE: ("🏆 Running CERTIFICATE qualification logic", "Cert", _cert_targets),
+    EducationType.KMTC: ("🏥 Running KMTC qualification logic", "KMTC", _kmtc_targets),
+}
+
+def _validated_grades(request: CourseCheckRequest) -> Tuple[Dict[str, str], str]:
+    """Validate the request's subjects and return (grade_dict, overall grade)
+
+    Raises a 400 HTTPException for invalid grades or a missing overall grade.
+    """
+    subject_pairs = tuple(map(subject_pair, request.subjects))
+    is_valid, error_msg = validate_subject_pairs(subject_pairs)
+    if not is_valid:
+        logger.warning(f"Invalid subjects for {request.email}: {error_msg}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error_msg
+        )
+    
+    # Extract grades from the subjects list
+    grade_dict, min_grade = _normalize_grades(subject_pairs)
+    
+    if not min_grade:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Overall grade is required"
+        )
+    
+    logger.info(f"📊 User grades extracted: {len(grade_dict)} subjects, overall={min_grade}")
+    return grade_dict, min_grade
+
+def _memo_key(request: CourseCheckRequest, grade_dict: Dict[str, str]) -> Tuple:
+    """Key for CourseCache.response_cache - results are a pure function of the cached data and these inputs"""
+    return (
+        request.education_type,
+        tuple(sorted(grade_dict.items())),
+        tuple(sorted(request.cluster_weights.items()))
+        if request.education_type == EducationType.DEGREE and request.cluster_weights else None
+    )
+
+def _checker_for(request: CourseCheckRequest, grade_dict: Dict[str, str]) -> GradeChecker:
+    """Create grade checker with ALL necessary info"""
+    return GradeChecker(
+        user_grades=grade_dict,
+        education_type=request.education_type,
+        cluster_weights=request.cluster_weights or {}
+    )
+
+async def _queue_writes(
+    writer: BackgroundWriter,
+    db: AsyncDatabase,
+    request: CourseCheckRequest,
+    results: List[Dict[str, Any]]
+) -> None:
+    """Queue the payments upsert and course_results insert - not awaited by the response"""
+    # Save user info for later (for checkout)
+    await writer.submit(db["payments"], UpdateOne(
+        {"$or": [{"email": request.email}, {"ksce_index": request.index_number}]},
+        {
+            "$set": {
+                "email": request.email,
+                "ksce_index": request.index_number,
+                "last_checked": datetime.utcnow()
+            }
+        },
+        upsert=True
+    ))
+    
+    # Save the course check results
+    result_doc = {
+        "email": request.email,
+        "index_number": request.index_number,
+        "education_type": request.education_type,
+        "results": results,
+        "created_at": datetime.utcnow()
+    }
+    await writer.submit(db["course_results"], InsertOne(result_doc))
 
 # ============================================================================
 # MAIN ENDPOINT
 # ============================================================================
 
-@router.post("/check", response_model=CourseCheckResponse)
+@router.post("/check", response_model=CourseCheckResponse, response_class=ORJSONResponse)
 async def check_courses(
     request: CourseCheckRequest,
-    db: AsyncIOMotorDatabase = Depends(get_db_by_name(settings.PAYMENTS_DB)),
-    cache: CourseCache = Depends(get_cache)
-) -> CourseCheckResponse:
+    db: AsyncDatabase = Depends(get_db_by_name(settings.PAYMENTS_DB)),
+    cache: CourseCache = Depends(get_cache),
+    writer: BackgroundWriter = Depends(get_writer)
+) -> ORJSONResponse:
     """Check which courses user qualifies for
     
     Multi-step qualification logic:
@@ -224,97 +272,47 @@ async def check_courses(
     - DIPLOMA/CERT/KMTC: minimum_grade → subject_requirements
     """
     
-    # Validate subjects
-    is_valid, error_msg = validate_subjects(request.subjects)
-    if not is_valid:
-        logger.warning(f"Invalid subjects for {request.email}: {error_msg}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=error_msg
-        )
+    grade_dict, min_grade = _validated_grades(request)
     
     try:
         logger.info(f"🔍 Checking courses for {request.email} - Type: {request.education_type}")
         
-        # Extract grades from the subjects list
-        grade_dict = {}
-        min_grade = None
+        memo_key = _memo_key(request, grade_dict)
+        generation = cache.cache_timestamp
+        results = cache.get_response(memo_key)
         
-        for subject in request.subjects:
-            subject_name = subject.subject.lower()
-            grade_dict[subject_name] = subject.grade
+        if results is not None:
+            logger.info(f"♻️ Reusing memoised results for {request.email}")
+        else:
+            checker = _checker_for(request, grade_dict)
             
-            # Overall grade is required
-            if subject_name == "overall":
-                min_grade = subject.grade
-        
-        if not min_grade:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Overall grade is required"
-            )
-        
-        logger.info(f"📊 User grades extracted: {len(grade_dict)} subjects, overall={min_grade}")
-        
-        # Create grade checker with ALL necessary info
-        checker = GradeChecker(
-            user_grades=grade_dict,
-            education_type=EducationType(request.education_type),
-            cluster_weights=request.cluster_weights or {}
-        )
-        
-        results = []
-        
-        # Check courses based on education type
-        if request.education_type == EducationType.DEGREE:
-            logger.info("🎓 Running DEGREE qualification logic with cut-off points")
-            results = await _check_degree(checker, min_grade, cache)
-        elif request.education_type == EducationType.DIPLOMA:
-            logger.info("📚 Running DIPLOMA qualification logic")
-            results = await _check_diploma(checker, min_grade, cache)
-        elif request.education_type == EducationType.CERTIFICATE:
-            logger.info("🏆 Running CERTIFICATE qualification logic")
-            results = await _check_certificate(checker, min_grade, cache)
-        elif request.education_type == EducationType.KMTC:
-            logger.info("🏥 Running KMTC qualification logic")
-            results = await _check_kmtc(checker, min_grade, cache)
+            # Check courses based on education type
+            message, label, build_targets = _DISPATCH[request.education_type]
+            logger.info(message)
+            results = await _check(checker, min_grade, build_targets(cache), label)
+            
+            cache.put_response(memo_key, results, generation)
         
         # Count total qualified programmes
-        total_qualified = sum(len(cluster.programmes) for cluster in results)
+        total_qualified = sum(len(cluster["programmes"]) for cluster in results)
         logger.info(f"✅ Found {len(results)} clusters with {total_qualified} qualified programmes")
         
-        # Save user info for later (for checkout)
-        await db["payments"].update_one(
-            {"$or": [{"email": request.email}, {"ksce_index": request.index_number}]},
-            {
-                "$set": {
-                    "email": request.email,
-                    "ksce_index": request.index_number,
-                    "last_checked": datetime.utcnow()
-                }
-            },
-            upsert=True
-        )
-        
-        # Save the course check results
-        result_doc = {
+        # CourseCheckResponse-shaped; the same results are stored and serialized by orjson
+        content = {
             "email": request.email,
             "index_number": request.index_number,
             "education_type": request.education_type,
-            "results": [r.dict() for r in results],
-            "created_at": datetime.utcnow()
+            "results": results,
+            # orjson writes naive datetimes exactly as isoformat() would
+            "timestamp": datetime.utcnow()
         }
-        await db["course_results"].insert_one(result_doc)
+        
+        await _queue_writes(writer, db, request, results)
         
         logger.info(f"✓ Course check complete for {request.email}")
         
-        return CourseCheckResponse(
-            email=request.email,
-            index_number=request.index_number,
-            education_type=request.education_type,
-            results=results,
-            timestamp=datetime.utcnow().isoformat()
-        )
+        # Built from validated dumps - skip FastAPI's re-validation and jsonable_encoder pass
+        return ORJSONResponse(content)
         
     except HTTPException:
         raise
@@ -326,6 +324,52 @@ async def check_courses(
         )
 
 
+@router.post("/check/stream")
+async def check_courses_stream(
+    request: CourseCheckRequest,
+    db: AsyncDatabase = Depends(get_db_by_name(settings.PAYMENTS_DB)),
+    cache: CourseCache = Depends(get_cache),
+    writer: BackgroundWriter = Depends(get_writer)
+) -> StreamingResponse:
+    """Check courses, streaming results as NDJSON
+    
+    Same qualification logic as /check, but each line is one ClusterResult
+    sent as soon as its cluster/category finishes, in completion order. The
+    results are saved like /check once the stream completes.
+    """
+    # Validation errors still get a proper status before the stream starts
+    grade_dict, min_grade = _validated_grades(request)
+    logger.info(f"🔍 Streaming courses for {request.email} - Type: {request.education_type}")
+    
+    async def generate() -> AsyncIterator[bytes]:
+        memo_key = _memo_key(request, grade_dict)
+        generation = cache.cache_timestamp
+        results = cache.get_response(memo_key)
+        
+        if results is not None:
+            logger.info(f"♻️ Reusing memoised results for {request.email}")
+            for cluster in results:
+                yield orjson.dumps(cluster) + b"\n"
+        else:
+            message, label, build_targets = _DISPATCH[request.education_type]
+            logger.info(message)
+            found = []
+            async for position, cluster in _iter_checked(
+                _checker_for(request, grade_dict), min_grade, build_targets(cache), label
+            ):
+                found.append((position, cluster))
+                yield orjson.dumps(cluster) + b"\n"
+            
+            found.sort(key=itemgetter(0))
+            results = [cluster for _, cluster in found]
+            cache.put_response(memo_key, results, generation)
+        
+        await _queue_writes(writer, db, request, results)
+        logger.info(f"✓ Course check stream complete for {request.email}")
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 # ============================================================================
 # BASKET ENDPOINTS
 # ============================================================================
@@ -333,7 +377,7 @@ async def check_courses(
 @router.post("/add-to-basket")
 async def add_to_basket(
     request: AddToBasketRequest,
-    db: AsyncIOMotorDatabase = Depends(get_db_by_name(settings.PAYMENTS_DB))
+    db: AsyncDatabase = Depends(get_db_by_name(settings.PAYMENTS_DB))
 ) -> Dict:
     """Add course to user's basket"""
     try:
@@ -352,29 +396,33 @@ async def add_to_basket(
             "added_date": datetime.utcnow()
         }
 
-        # Check if course already in basket
-        existing = await baskets_collection.find_one({
-            "email": request.email,
-            "basket.programme_code": request.course.programme_code
-        })
+        # Add to basket (create or update) unless the course is already in it.
+        # The duplicate check runs inside the update, so it is atomic and costs
+        # no extra round trip; filtering on basket.programme_code instead would
+        # make the upsert create a second basket when the course is present.
+        basket = {"$ifNull": ["$basket", []]}
+        # $literal so user-supplied strings starting with "$" aren't read as field paths
+        already_added = {
+            "$in": [{"$literal": request.course.programme_code}, {"$ifNull": ["$basket.programme_code", []]}]
+        }
+        result = await baskets_collection.update_one(
+            {"email": request.email},
+            [{
+                "$set": {
+                    "basket": {"$cond": [already_added, "$basket", {"$concatArrays": [basket, [{"$literal": basket_item}]]}]},
+                    "last_updated": {"$cond": [already_added, "$last_updated", datetime.utcnow()]}
+                }
+            }],
+            upsert=True
+        )
 
-        if existing:
+        if result.modified_count == 0 and result.upserted_id is None:
             logger.info(f"⚠️ Course already in basket for {request.email}")
             return {
                 "status": "exists",
                 "message": "This course is already in your basket"
             }
 
-        # Add to basket (create or update)
-        result = await baskets_collection.update_one(
-            {"email": request.email},
-            {
-                "$push": {"basket": basket_item},
-                "$set": {"last_updated": datetime.utcnow()}
-            },
-            upsert=True
-        )
-
         logger.info(f"✓ Added course to basket for {request.email}: {request.course.programme_name}")
 
         return {
@@ -391,10 +439,15 @@ async def add_to_basket(
         )
 
 
+def _date_str(value: Any) -> str:
+    """ISO format for stored datetimes, str() for anything else"""
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
 @router.get("/user-basket")
 async def get_user_basket(
     email: str = Query(..., description="User email"),
-    db: AsyncIOMotorDatabase = Depends(get_db_by_name(settings.PAYMENTS_DB))
+    db: AsyncDatabase = Depends(get_db_by_name(settings.PAYMENTS_DB))
 ) -> UserBasketResponse:
     """Get user's course basket"""
     try:
@@ -415,29 +468,20 @@ async def get_user_basket(
             )
 
         # Convert basket items
-        basket_items = []
-        for item in basket_record.get("basket", []):
-            added_date = item.get("added_date")
-            if isinstance(added_date, datetime):
-                added_date_str = added_date.isoformat()
-            else:
-                added_date_str = str(added_date)
-            
-            basket_items.append(BasketItemResponse(
+        basket_items = [
+            BasketItemResponse(
                 institution_name=item.get("institution_name", ""),
                 programme_name=item.get("programme_name", ""),
                 programme_code=item.get("programme_code", ""),
                 cluster_name=item.get("cluster_name", ""),
                 minimum_grade=item.get("minimum_grade", ""),
                 cut_off_points=item.get("cut_off_points", 0.0),
-                added_date=added_date_str
-            ))
+                added_date=_date_str(item.get("added_date"))
+            )
+            for item in basket_record.get("basket", [])
+        ]
 
-        last_updated = basket_record.get("last_updated")
-        if isinstance(last_updated, datetime):
-            last_updated_str = last_updated.isoformat()
-        else:
-            last_updated_str = str(last_updated)
+        last_updated_str = _date_str(basket_record.get("last_updated"))
 
         logger.info(f"✓ Retrieved basket for {email} with {len(basket_items)} items")
 
@@ -459,7 +503,7 @@ async def get_user_basket(
 @router.delete("/remove-from-basket")
 async def remove_from_basket(
     request: RemoveFromBasketRequest,
-    db: AsyncIOMotorDatabase = Depends(get_db_by_name(settings.PAYMENTS_DB))
+    db: AsyncDatabase = Depends(get_db_by_name(settings.PAYMENTS_DB))
 ) -> Dict:
     """Remove course from user's basket"""
     try:
@@ -503,7 +547,7 @@ async def remove_from_basket(
 @router.delete("/clear-basket")
 async def clear_basket(
     email: str = Query(..., description="User email"),
-    db: AsyncIOMotorDatabase = Depends(get_db_by_name(settings.PAYMENTS_DB))
+    db: AsyncDatabase = Depends(get_db_by_name(settings.PAYMENTS_DB))
 ) -> Dict:
     """Clear all courses from user's basket"""
     try:
@@ -4,13 +4,12 @@
 """Payment endpoints - Complete implementation with discount logic"""
 
 from fastapi import APIRouter, HTTPException, status, Depends
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 from datetime import datetime
 import logging
 import httpx
 import os
 
-from app_entry.core import globals as app_globals
 from app_entry.core.config import settings
 from app_entry.core.dependencies import get_db_by_name
 from app_entry.schemas.payments import (
@@ -36,7 +35,10 @@ AMOUNT_KOBO = AMOUNT_KES * 100  # Convert to kobo (500)
 # ==================== CHECK USER - DISCOUNT ELIGIBILITY ====================
 
 @router.post("/check-user", response_model=CheckUserResponse)
-async def check_user(request: CheckUserRequest) -> CheckUserResponse:
+async def check_user(
+    request: CheckUserRequest,
+    payments_db: AsyncDatabase = Depends(get_db_by_name(settings.PAYMENTS_DB))
+) -> CheckUserResponse:
     """
     Check if user is a returning customer for discount eligibility
     Logic:
@@ -47,29 +49,26 @@ async def check_user(request: CheckUserRequest) -> CheckUserResponse:
     try:
         logger.info(f"🔍 Checking user: {request.email}")
 
-        # Get the payments database dynamically
-        if not app_globals.client:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Database client unavailable"
-            )
-        
-        payments_db = app_globals.client[settings.PAYMENTS_DB]
         payments_collection = payments_db["payments_info"]
 
-        payments = await payments_collection.find(
-            {
-                "email": request.email,
-                "index_number": request.index_number,
-                "status": "success"
-            }
-        ).to_list(None)
+        # Only education_type is needed - one entry per successful payment
+        payment_types = [
+            p.get("education_type")
+            async for p in payments_collection.find(
+                {
+                    "email": request.email,
+                    "index_number": request.index_number,
+                    "status": "success"
+                },
+                projection={"education_type": 1, "_id": 0}
+            )
+        ]
 
-        if not payments:
+        if not payment_types:
             logger.info(f"👤 New user: {request.email}")
             return CheckUserResponse(exists=False, education_types=[], hasThisType=False)
 
-        education_types = [p.get("education_type") for p in payments if p.get("education_type")]
+        education_types = [t for t in payment_types if t]
         hasThisType = request.education_type in education_types
 
         logger.info(f"✓ Returning user: {request.email}")
@@ -88,7 +87,10 @@ async def check_user(request: CheckUserRequest) -> CheckUserResponse:
 # ==================== VERIFY PAYMENT ====================
 
 @router.post("/verify", response_model=PaymentVerifyResponse)
-async def verify_payment(request: PaymentVerifyRequest) -> PaymentVerifyResponse:
+async def verify_payment(
+    request: PaymentVerifyRequest,
+    payments_db: AsyncDatabase = Depends(get_db_by_name(settings.PAYMENTS_DB))
+) -> PaymentVerifyResponse:
     """
     Verify payment with Paystack and save user data
     Steps:
@@ -100,24 +102,13 @@ async def verify_payment(request: PaymentVerifyRequest) -> PaymentVerifyResponse
     try:
         logger.info(f"🔄 Verifying payment: {request.reference}")
 
-        # Get the payments database dynamically
-        if not app_globals.client:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Database client unavailable"
-            )
-        
-        payments_db = app_globals.client[settings.PAYMENTS_DB]
         payments_collection = payments_db["payments_info"]
         data_collection = payments_db["client_course_data"]
 
         """
-        # STEP 1: VERIFY WITH PAYSTACK
-        async with httpx.AsyncClient() as http_client:
-            paystack_response = await http_client.get(
-                f"https://api.paystack.co/transaction/verify/{request.reference}",
-                headers={"Authorization": f"Bearer {PAYSTACK_SECRET_KEY}"}
-            )
+        # STEP 1: VERIFY WITH PAYSTACK (shared client - base_url and auth header preset)
+        # Re-enabling this needs `paystack: httpx.AsyncClient = Depends(get_paystack)`
+        paystack_response = await paystack.get(f"/transaction/verify/{request.reference}")
 
         paystack_data = paystack_response.json()
         if not paystack_data.get('status'):
@@ -177,19 +168,14 @@ async def verify_payment(request: PaymentVerifyRequest) -> PaymentVerifyResponse
 # ==================== GET USER RESULTS ====================
 
 @router.post("/user-results", response_model=UserResultsResponse)
-async def get_user_results(request: UserResultsRequest) -> UserResultsResponse:
+async def get_user_results(
+    request: UserResultsRequest,
+    payments_db: AsyncDatabase = Depends(get_db_by_name(settings.PAYMENTS_DB))
+) -> UserResultsResponse:
     """Retrieve stored course results for a user"""
     try:
         logger.info(f"📊 Retrieving results for: {request.email}")
 
-        # Get the payments database dynamically
-        if not app_globals.client:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Database client unavailable"
-            )
-        
-        payments_db = app_globals.client[settings.PAYMENTS_DB]
         payments_collection = payments_db["payments_info"]
         data_collection = payments_db["client_course_data"]
 
@@ -231,28 +217,28 @@ async def get_user_results(request: UserResultsRequest) -> UserResultsResponse:
 # ==================== GET USER PAYMENT TYPES ====================
 
 @router.get("/user-payment-types", response_model=UserPaymentTypesResponse)
-async def get_user_payment_types(email: str, index_number: str) -> UserPaymentTypesResponse:
+async def get_user_payment_types(
+    email: str,
+    index_number: str,
+    payments_db: AsyncDatabase = Depends(get_db_by_name(settings.PAYMENTS_DB))
+) -> UserPaymentTypesResponse:
     """Get all education types a user has purchased"""
     try:
         logger.info(f"📋 Getting payment types for: {email}")
 
-        # Get the payments database dynamically
-        if not app_globals.client:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Database client unavailable"
-            )
-        
-        payments_db = app_globals.client[settings.PAYMENTS_DB]
         payments_collection = payments_db["payments_info"]
 
-        payments = await payments_collection.find({
-            "email": email,
-            "index_number": index_number,
-            "status": "success"
-        }).to_list(None)
-
-        education_types = [p.get("education_type") for p in payments]
+        education_types = [
+            p.get("education_type")
+            async for p in payments_collection.find(
+                {
+                    "email": email,
+                    "index_number": index_number,
+                    "status": "success"
+                },
+                projection={"education_type": 1, "_id": 0}
+            )
+        ]
         return UserPaymentTypesResponse(
             email=email,
             index_number=index_number,
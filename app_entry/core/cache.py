@@ -3,14 +3,41 @@
 # ============================================================================
 """Course data caching system"""
 
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Dict, Hashable, List, Any, Optional, Tuple
+import asyncio
 import logging
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 from app_entry.core.config import settings
+from app_entry.core.snapshot import read_snapshot, snapshot_file, snapshot_lock, write_snapshot
+from app_entry.schemas.education import Programme
+from app_entry.utils.grade_checker import GradeChecker
+from app_entry.utils.programme_index import ProgrammeIndex
 
 logger = logging.getLogger(__name__)
 
+# Shared index for missing or failed-to-load collections
+EMPTY_INDEX = ProgrammeIndex([])
+
+# Keys _precompute adds to each programme - rebuilt per process, never snapshotted
+PRECOMPUTED_KEYS = ("_reqs", "_dump")
+
+# The only programme fields GradeChecker and Programme read
+PROGRAMME_PROJECTION = {
+    "institution_name": 1,
+    "programme_name": 1,
+    "programme_code": 1,
+    "cut_off_points": 1,
+    "minimum_grade": 1,
+    "minimum_subject_requirements": 1,
+    "_id": 0,
+}
+
+# Cursor batch size for cache loads - big enough that a whole collection comes
+# back in the first batch instead of 101 documents plus getMore round trips
+LOAD_BATCH_SIZE = 5000
+
 class CourseCache:
     """In-memory cache for course data with TTL support"""
 
@@ -36,10 +63,29 @@ class CourseCache:
 
     KMTC_CATEGORIES = ["kmtc"]
 
-    def __init__(self, client: AsyncIOMotorClient, ttl_hours: int = 6):
-        """Initialize cache with Mongo client"""
+    def __init__(
+        self,
+        client: AsyncMongoClient,
+        ttl_hours: int = 6,
+        response_cache_size: int = 10000,
+        snapshot_path: str = ""
+    ):
+        """Initialize cache with Mongo client
+
+        With a snapshot_path, workers share one load: the first to start reads
+        Mongo and writes the snapshot, the rest load the snapshot while fresh.
+        The file name is keyed by the Mongo URI, database names and projection,
+        and a snapshot older than this cache is never loaded, so a restart
+        always reads the catalogue from Mongo again.
+        """
         self.client = client
         self.ttl = timedelta(hours=ttl_hours)
+        self.response_cache_size = response_cache_size
+        self.snapshot_path = snapshot_file(
+            snapshot_path, settings.MONGO_URI, settings.DEGREE_DB, settings.DP_COURSES_DB,
+            settings.CERT_COURSES_DB, settings.KMTC_COURSES_DB, PROGRAMME_PROJECTION
+        ) if snapshot_path else ""
+        self.created_at = datetime.utcnow()
         self.cache_timestamp: datetime = None  # type: ignore
 
         # Cache stores
@@ -48,85 +94,285 @@ class CourseCache:
         self.cert_cache: Dict[str, List[Any]] = {}
         self.kmtc_cache: Dict[str, List[Any]] = {}
 
+        # Vectorised requirement indexes, one per cluster/category
+        self.degree_index: Dict[str, ProgrammeIndex] = {}
+        self.diploma_index: Dict[str, ProgrammeIndex] = {}
+        self.cert_index: Dict[str, ProgrammeIndex] = {}
+        self.kmtc_index: Dict[str, ProgrammeIndex] = {}
+
+        # Check results keyed by normalised request, valid until the next refresh (LRU)
+        self.response_cache: "OrderedDict[Hashable, List[Any]]" = OrderedDict()
+
+        # Background refresh started by maybe_refresh once the TTL has passed
+        self._refresh_task: Optional[asyncio.Task] = None
+        # Serialises loads within this worker (startup, background refresh)
+        self._load_lock = asyncio.Lock()
+
         logger.debug("CourseCache initialized")
 
     async def initialize(self) -> None:
         """Load all course data into memory on startup"""
         try:
-            await self.refresh_all()
+            await self._load()
             logger.info("✓ Course cache initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize cache: {e}")
             raise
 
+    def maybe_refresh(self) -> None:
+        """Start a background refresh once the TTL has passed
+
+        Requests keep being served from the stale data until the new data is
+        swapped in; only one refresh runs at a time.
+        """
+        if not self.should_refresh():
+            return
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.create_task(self._background_refresh())
+
+    async def close(self) -> None:
+        """Cancel a background refresh still in flight"""
+        if self._refresh_task is None or self._refresh_task.done():
+            return
+        self._refresh_task.cancel()
+        try:
+            await self._refresh_task
+        except asyncio.CancelledError:
+            pass
+
+    async def _background_refresh(self) -> None:
+        """Reload the cache for maybe_refresh, keeping the stale data on failure"""
+        logger.info("♻️ Course cache is stale, refreshing in the background")
+        try:
+            await self._load()
+        except Exception as e:
+            logger.error(f"❌ Background cache refresh failed, still serving stale data: {e}")
+
+    async def _load(self) -> None:
+        """Load from a fresh snapshot if there is one, otherwise from Mongo
+
+        Single-flight: a caller that waited on another load returns without
+        loading again if that one left the cache fresh.
+        """
+        async with self._load_lock:
+            if not self.should_refresh():
+                return
+
+            if not self.snapshot_path:
+                await self.refresh_all()
+                return
+
+            # Serialise loads across workers so only one of them hits Mongo
+            async with snapshot_lock(self.snapshot_path):
+                if not await self._load_snapshot():
+                    await self.refresh_all()
+                    await self._save_snapshot()
+
     async def refresh_all(self) -> None:
         """Refresh all cached course data from database"""
         try:
             logger.info("Starting cache refresh...")
 
-            await self._load_degree_clusters()
+            # Every collection is independent - load them all concurrently
+            await asyncio.gather(
+                self._load_degree_clusters(),
+                self._load_diploma_categories(),
+                self._load_cert_categories(),
+                self._load_kmtc()
+            )
             logger.info(f"  ✓ Loaded {len(self.degree_cache)} degree clusters")
-
-            await self._load_diploma_categories()
             logger.info(f"  ✓ Loaded {len(self.diploma_cache)} diploma categories")
-
-            await self._load_cert_categories()
             logger.info(f"  ✓ Loaded {len(self.cert_cache)} certificate categories")
-
-            await self._load_kmtc()
             logger.info(f"  ✓ Loaded {len(self.kmtc_cache)} KMTC programmes")
 
             self.cache_timestamp = datetime.utcnow()
+            # Memoised results were computed against the old data
+            self.response_cache.clear()
             logger.info("✓ All caches refreshed successfully")
 
         except Exception as e:
             logger.error(f"Error refreshing cache: {e}")
             raise
 
+    async def _load_snapshot(self) -> bool:
+        """Populate the cache from a fresh snapshot; False if none is usable"""
+        snapshot = await asyncio.to_thread(read_snapshot, self.snapshot_path)
+        if not snapshot:
+            return False
+
+        timestamp = snapshot.get("timestamp")
+        if not isinstance(timestamp, datetime) or datetime.utcnow() - timestamp > self.ttl:
+            logger.info("Cache snapshot is stale, reloading from database")
+            return False
+        if timestamp < self.created_at:
+            # Left over from before this restart - the catalogue may have changed since
+            logger.info("Cache snapshot predates this worker, reloading from database")
+            return False
+
+        for key in ("degree", "diploma", "cert", "kmtc"):
+            collections = snapshot.get(key, {})
+            names = list(collections)
+            store, index = await asyncio.to_thread(
+                self._store,
+                getattr(self, f"{key}_cache"), getattr(self, f"{key}_index"),
+                names, [collections[name] for name in names], f"{key} ",
+                by_cutoff=key == "degree"
+            )
+            setattr(self, f"{key}_cache", store)
+            setattr(self, f"{key}_index", index)
+
+        self.cache_timestamp = timestamp
+        self.response_cache.clear()
+        logger.info(f"✓ Loaded course cache snapshot from {timestamp.isoformat()}")
+        return True
+
+    async def _save_snapshot(self) -> None:
+        """Write the raw cached documents for other workers; failures only cost them a reload"""
+        def strip(store: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+            return {
+                name: [{k: v for k, v in p.items() if k not in PRECOMPUTED_KEYS} for p in programmes]
+                for name, programmes in store.items()
+            }
+
+        snapshot = {
+            "timestamp": self.cache_timestamp,
+            "degree": strip(self.degree_cache),
+            "diploma": strip(self.diploma_cache),
+            "cert": strip(self.cert_cache),
+            "kmtc": strip(self.kmtc_cache),
+        }
+        try:
+            await asyncio.to_thread(write_snapshot, self.snapshot_path, snapshot)
+            logger.info(f"✓ Wrote course cache snapshot to {self.snapshot_path}")
+        except Exception as e:
+            logger.warning(f"Failed to write cache snapshot {self.snapshot_path}: {e}")
+
+    async def _fetch_collections(self, db_name: str, names: List[str]) -> List[Any]:
+        """Fetch several collections of one database concurrently
+
+        Returns one list of documents per name, or the exception that load raised.
+        Only PROGRAMME_PROJECTION fields are fetched.
+        """
+        db = self.client[db_name]
+        return await asyncio.gather(
+            *[
+                db[name].find({}, PROGRAMME_PROJECTION, batch_size=LOAD_BATCH_SIZE).to_list(None)
+                for name in names
+            ],
+            return_exceptions=True
+        )
+
+    def _store(
+        self,
+        old_store: Dict[str, List[Any]],
+        old_index: Dict[str, ProgrammeIndex],
+        names: List[str],
+        results: List[Any],
+        label: str,
+        by_cutoff: bool = False
+    ) -> Tuple[Dict[str, List[Any]], Dict[str, ProgrammeIndex]]:
+        """Precompute fetched collections into new (store, index) dicts
+
+        A collection that failed to load keeps its previous data (empty on the
+        first load). Callers run this in a thread, so validation and index
+        building don't stall requests, then swap the returned dicts in whole on
+        the loop - requests never see a half-refreshed database. by_cutoff is
+        passed to ProgrammeIndex.
+        """
+        store: Dict[str, List[Any]] = {}
+        index: Dict[str, ProgrammeIndex] = {}
+        for name, data in zip(names, results):
+            if isinstance(data, Exception):
+                logger.warning(f"Failed to load {label}{name}: {data}")
+                store[name] = old_store.get(name, [])
+                index[name] = old_index.get(name, EMPTY_INDEX)
+                continue
+            store[name] = self._precompute(data or [])
+            index[name] = ProgrammeIndex(store[name], by_cutoff=by_cutoff)
+        return store, index
+
     async def _load_degree_clusters(self) -> None:
         """Load degree cluster data from DEGREE_DB"""
-        db_degree = self.client[settings.DEGREE_DB]
-        for i in range(1, 21):
-            cluster_name = f"cluster_{i}"
-            try:
-                data = await db_degree[cluster_name].find({}).to_list(None)
-                self.degree_cache[cluster_name] = data or []
-            except Exception as e:
-                logger.warning(f"Failed to load {cluster_name}: {e}")
-                self.degree_cache[cluster_name] = []
+        names = [f"cluster_{i}" for i in range(1, 21)]
+        results = await self._fetch_collections(settings.DEGREE_DB, names)
+        self.degree_cache, self.degree_index = await asyncio.to_thread(
+            self._store, self.degree_cache, self.degree_index, names, results, "", by_cutoff=True
+        )
 
     async def _load_diploma_categories(self) -> None:
         """Load diploma category data from DP_COURSES_DB"""
-        db_diploma = self.client[settings.DP_COURSES_DB]
-        for category in self.DIPLOMA_CATEGORIES:
-            try:
-                data = await db_diploma[category].find({}).to_list(None)
-                self.diploma_cache[category] = data or []
-            except Exception as e:
-                logger.warning(f"Failed to load diploma {category}: {e}")
-                self.diploma_cache[category] = []
+        results = await self._fetch_collections(settings.DP_COURSES_DB, self.DIPLOMA_CATEGORIES)
+        self.diploma_cache, self.diploma_index = await asyncio.to_thread(
+            self._store, self.diploma_cache, self.diploma_index, self.DIPLOMA_CATEGORIES, results, "diploma "
+        )
 
     async def _load_cert_categories(self) -> None:
         """Load certificate category data from CERT_COURSES_DB"""
-        db_cert = self.client[settings.CERT_COURSES_DB]
-        for category in self.CERT_CATEGORIES:
-            try:
-                data = await db_cert[category].find({}).to_list(None)
-                self.cert_cache[category] = data or []
-            except Exception as e:
-                logger.warning(f"Failed to load cert {category}: {e}")
-                self.cert_cache[category] = []
+        results = await self._fetch_collections(settings.CERT_COURSES_DB, self.CERT_CATEGORIES)
+        self.cert_cache, self.cert_index = await asyncio.to_thread(
+            self._store, self.cert_cache, self.cert_index, self.CERT_CATEGORIES, results, "cert "
+        )
 
     async def _load_kmtc(self) -> None:
         """Load KMTC data from KMTC_COURSES_DB"""
-        db_kmtc = self.client[settings.KMTC_COURSES_DB]
-        for category in self.KMTC_CATEGORIES:
-            try:
-                data = await db_kmtc[category].find({}).to_list(None)
-                self.kmtc_cache[category] = data or []
-            except Exception as e:
-                logger.warning(f"Failed to load kmtc: {e}")
-                self.kmtc_cache[category] = []
+        results = await self._fetch_collections(settings.KMTC_COURSES_DB, self.KMTC_CATEGORIES)
+        self.kmtc_cache, self.kmtc_index = await asyncio.to_thread(
+            self._store, self.kmtc_cache, self.kmtc_index, self.KMTC_CATEGORIES, results, "kmtc "
+        )
+
+    @classmethod
+    def _precompute(cls, programmes: List[Any]) -> List[Any]:
+        """Attach compiled requirements and the dumped response model to each programme
+
+        Requests then skip re-parsing requirements, Pydantic validation and
+        serializing the model. Only the dump is kept - the model itself isn't
+        needed once it has been validated.
+        """
+        for p in programmes:
+            p["_reqs"] = GradeChecker.compile_requirements(p)
+            model = cls._programme_model(p)
+            p["_dump"] = model.model_dump() if model is not None else None
+        return programmes
+
+    @staticmethod
+    def _programme_model(p: Dict[str, Any]) -> Optional[Programme]:
+        """Build the Programme returned for a raw document, or None if it won't validate"""
+        try:
+            # Handle minimum_grade - it's a dict like {'mean_grade': 'D'}
+            min_grade = p.get("minimum_grade", {})
+            if isinstance(min_grade, dict):
+                grade_value = min_grade.get("mean_grade", "")
+            else:
+                grade_value = str(min_grade) if min_grade else None
+
+            code = p.get("programme_code")
+            cut_off = p.get("cut_off_points")
+            requirements = p.get("minimum_subject_requirements")
+            data = {
+                "institution_name": str(p.get("institution_name", "")),
+                "programme_name": str(p.get("programme_name", "")),
+                "programme_code": str(code) if code else None,
+                "cut_off_points": float(cut_off) if cut_off else None,
+                "minimum_grade": grade_value,
+                "minimum_subject_requirements": requirements if isinstance(requirements, dict) else {}
+            }
+        except Exception as e:
+            logger.error(f"Error converting programme: {e}")
+            data = {
+                "institution_name": "",
+                "programme_name": "",
+                "programme_code": None,
+                "cut_off_points": None,
+                "minimum_grade": None,
+                "minimum_subject_requirements": {}
+            }
+
+        try:
+            return Programme(**data)
+        except Exception as e:
+            logger.warning(f"Error checking programme {p.get('programme_name')}: {e}")
+            return None
 
     def should_refresh(self) -> bool:
         """Check if cache needs refresh based on TTL"""
@@ -134,18 +380,37 @@ class CourseCache:
             return True
         return datetime.utcnow() - self.cache_timestamp > self.ttl
 
-    def get_degree_cluster(self, cluster_no: int) -> List[Any]:
-        """Get cached degree cluster data"""
-        return self.degree_cache.get(f"cluster_{cluster_no}", [])
+    def get_response(self, key: Hashable) -> Optional[List[Any]]:
+        """Get memoised check results for a normalised request, if any"""
+        results = self.response_cache.get(key)
+        if results is not None:
+            self.response_cache.move_to_end(key)
+        return results
+
+    def put_response(self, key: Hashable, results: List[Any], generation: datetime) -> None:
+        """Memoise check results computed against the cache as of `generation`
+
+        Results are dropped if a refresh finished while they were being computed.
+        """
+        if generation != self.cache_timestamp:
+            return
+        self.response_cache[key] = results
+        self.response_cache.move_to_end(key)
+        if len(self.response_cache) > self.response_cache_size:
+            self.response_cache.popitem(last=False)
+
+    def get_degree_index(self, cluster_no: int) -> ProgrammeIndex:
+        """Get vectorised requirement index for a degree cluster"""
+        return self.degree_index.get(f"cluster_{cluster_no}", EMPTY_INDEX)
 
-    def get_diploma_category(self, category: str) -> List[Any]:
-        """Get cached diploma category data"""
-        return self.diploma_cache.get(category, [])
+    def get_diploma_index(self, category: str) -> ProgrammeIndex:
+        """Get vectorised requirement index for a diploma category"""
+        return self.diploma_index.get(category, EMPTY_INDEX)
 
-    def get_cert_category(self, category: str) -> List[Any]:
-        """Get cached certificate category data"""
-        return self.cert_cache.get(category, [])
+    def get_cert_index(self, category: str) -> ProgrammeIndex:
+        """Get vectorised requirement index for a certificate category"""
+        return self.cert_index.get(category, EMPTY_INDEX)
 
-    def get_kmtc(self) -> List[Any]:
-        """Get cached KMTC programmes"""
-        return self.kmtc_cache.get("kmtc", [])
+    def get_kmtc_index(self, category: str = "kmtc") -> ProgrammeIndex:
+        """Get vectorised requirement index for KMTC programmes"""
+        return self.kmtc_index.get(category, EMPTY_INDEX)
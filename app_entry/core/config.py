@@ -3,7 +3,8 @@
 
 """Application configuration from environment variables"""
 
-from pydantic_settings import BaseSettings # type: ignore
+from pydantic_settings import BaseSettings, SettingsConfigDict # type: ignore
+from functools import lru_cache
 from typing import List
 import os
 from pathlib import Path
@@ -21,6 +22,12 @@ class Settings(BaseSettings):
     CERT_COURSES_DB: str = 'cert_courses'
     KMTC_COURSES_DB: str = 'kmtc'
     PAYMENTS_DB: str = 'payments_db'
+    # Connection pool - min connections are opened at startup, not on first request
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 10
+    # Idle connections above the minimum are closed after this long
+    MONGO_MAX_IDLE_TIME_MS: int = 60000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
     
     # API
     API_TITLE: str = 'KUCCPS Course Checker'
@@ -47,12 +54,32 @@ class Settings(BaseSettings):
     
     # Cache - in hours
     CACHE_TTL_HOURS: int = 6
+    # Memoised check results, dropped on every refresh
+    RESPONSE_CACHE_MAX_SIZE: int = 10000
+    # Snapshot shared by workers so only one loads from Mongo, e.g.
+    # /dev/shm/kuccps_course_cache.bson - empty (the default) disables it
+    CACHE_SNAPSHOT_PATH: str = os.getenv('CACHE_SNAPSHOT_PATH', '')
+    # Per-user cluster weights lookups - in seconds
+    CLUSTER_WEIGHTS_CACHE_TTL_SECONDS: int = 300
+    CLUSTER_WEIGHTS_CACHE_MAX_SIZE: int = 10000
+    
+    # Clusters/categories of one course check filtered in the threadpool at once
+    CHECK_MAX_CONCURRENCY: int = 8
+    
+    # Background writes - non-critical writes are batched off the request path
+    WRITE_BATCH_SIZE: int = 100
+    WRITE_FLUSH_INTERVAL_MS: int = 50
+    WRITE_QUEUE_MAX_SIZE: int = 10000
     
     # Logging
     LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO')
     
-    class Config:
-        env_file = '.env'
-        case_sensitive = True
+    # Frozen - settings are read-only once loaded
+    model_config = SettingsConfigDict(env_file='.env', case_sensitive=True, frozen=True)
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Parse the environment and .env once; every caller shares the instance"""
+    return Settings()
 
-settings = Settings()
+settings = get_settings()
@@ -1,14 +1,15 @@
 # ============================================================================
-# FILE: app_entry/core/dependencies.py (FIXED - no circular imports)
+# FILE: app_entry/core/dependencies.py (UPDATED - reads shared instances from app.state)
 # ============================================================================
 """Dependency injection for FastAPI routes"""
 
-from fastapi import HTTPException, status
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from fastapi import HTTPException, Request, status
+from pymongo.asynchronous.database import AsyncDatabase
+import httpx
 import logging
 
-from app_entry.core import globals as app_globals
-from app_entry.core.config import settings
+from app_entry.core.cache import CourseCache
+from app_entry.core.writer import BackgroundWriter
 
 logger = logging.getLogger(__name__)
 
@@ -16,27 +17,63 @@ def get_db_by_name(db_name: str):
     """Factory to get a specific database by name
     
     Usage in routes:
-        db: AsyncIOMotorDatabase = Depends(get_db_by_name(settings.PAYMENTS_DB))
+        db: AsyncDatabase = Depends(get_db_by_name(settings.PAYMENTS_DB))
     """
-    async def _get_db() -> AsyncIOMotorDatabase:
-        if app_globals.client is None:
+    async def _get_db(request: Request) -> AsyncDatabase:
+        dbs = getattr(request.app.state, "dbs", None)
+        if dbs is None:
             logger.error("Database client is not available")
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Database client unavailable"
             )
-        return app_globals.client[db_name]
+        db = dbs.get(db_name)
+        if db is None:
+            # Not opened at startup - open it once and reuse it
+            db = dbs[db_name] = request.app.state.client[db_name]
+        return db
     return _get_db
 
-async def get_cache():
+async def get_cache(request: Request) -> CourseCache:
     """Get cache instance
     
-    This provides the course cache to any endpoint that needs it
+    This provides the course cache to any endpoint that needs it, kicking off
+    a background refresh (served stale meanwhile) once its TTL has passed
     """
-    if app_globals.cache is None:
+    cache = getattr(request.app.state, "cache", None)
+    if cache is None:
         logger.error("Cache is not available")
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Cache unavailable"
         )
-    return app_globals.cache
\ No newline at end of file
+    cache.maybe_refresh()
+    return cache
+
+async def get_writer(request: Request) -> BackgroundWriter:
+    """Get background writer instance
+    
+    Endpoints use this to queue writes that don't need to finish before responding
+    """
+    writer = getattr(request.app.state, "writer", None)
+    if writer is None:
+        logger.error("Background writer is not available")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Background writer unavailable"
+        )
+    return writer
+
+async def get_paystack(request: Request) -> httpx.AsyncClient:
+    """Get the shared Paystack HTTP client
+    
+    Its base_url and Authorization header are already set for the Paystack API
+    """
+    paystack = getattr(request.app.state, "paystack", None)
+    if paystack is None:
+        logger.error("Paystack client is not available")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Payment gateway unavailable"
+        )
+    return paystack
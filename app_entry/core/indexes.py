@@ -0,0 +1,63 @@
+# ============================================================================
+# FILE: app_entry/core/indexes.py
+# ============================================================================
+"""MongoDB indexes created at startup"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Tuple
+
+from pymongo import AsyncMongoClient
+
+from app_entry.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (database, collection) -> list of (keys, options) passed to create_index
+INDEXES: Dict[Tuple[str, str], List[Tuple[Any, Dict[str, Any]]]] = {
+    # check_courses upserts on {"$or": [{"email"}, {"ksce_index"}]}
+    (settings.PAYMENTS_DB, "payments"): [
+        ("email", {}),
+        ("ksce_index", {}),
+    ],
+    (settings.PAYMENTS_DB, "course_results"): [
+        ([("email", 1), ("created_at", -1)], {}),
+    ],
+    # get_user_cluster_weights: latest successful record per email, sort served by the index
+    (settings.PAYMENTS_DB, "cluster_weights"): [
+        ([("email", 1), ("status", 1), ("timestamp", -1)], {}),
+    ],
+    # check-user / user-payment-types filter on status, user-results on education_type
+    (settings.PAYMENTS_DB, "payments_info"): [
+        ([("email", 1), ("index_number", 1), ("status", 1), ("education_type", 1)], {}),
+    ],
+    (settings.PAYMENTS_DB, "client_course_data"): [
+        ([("reference", 1), ("index_number", 1), ("education_type", 1)], {}),
+    ],
+    # Every basket endpoint reads or updates by email only
+    (settings.PAYMENTS_DB, "course_baskets"): [
+        ("email", {}),
+    ],
+}
+
+
+async def ensure_indexes(client: AsyncMongoClient) -> None:
+    """Create all indexes concurrently (create_index is idempotent)
+
+    Failures are logged and don't stop startup - queries still work without
+    an index, just slower.
+    """
+    tasks = []
+    names = []
+    for (db_name, collection_name), specs in INDEXES.items():
+        collection = client[db_name][collection_name]
+        for keys, options in specs:
+            tasks.append(collection.create_index(keys, **options))
+            names.append(f"{db_name}.{collection_name} {keys}")
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Failed to create index on {name}: {result}")
+
+    logger.info(f"✓ Ensured {len(tasks)} indexes")
@@ -0,0 +1,104 @@
+# ============================================================================
+# FILE: app_entry/core/snapshot.py
+# ============================================================================
+"""On-disk snapshot of the course cache shared by worker processes"""
+
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+
+import bson
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock
+    fcntl = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the snapshot layout or the shape of the stored documents changes
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+def snapshot_file(path: str, *keys: Any) -> str:
+    """`path` with a hash of `keys` and the format version before its extension
+
+    Deployments reading different databases, or storing documents in a
+    different shape, then never pick up each other's snapshot.
+    """
+    digest = hashlib.sha256(repr((SNAPSHOT_FORMAT_VERSION,) + keys).encode()).hexdigest()[:16]
+    root, ext = os.path.splitext(path)
+    return f"{root}.{digest}{ext}"
+
+
+@asynccontextmanager
+async def snapshot_lock(path: str) -> AsyncIterator[None]:
+    """Hold an exclusive lock on `path`.lock so only one worker builds the snapshot
+
+    A no-op where fcntl is unavailable or the lock file can't be opened - every
+    worker then loads on its own.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        lock_file = open(f"{path}.lock", "w")
+    except OSError as e:
+        logger.warning(f"Cannot lock cache snapshot {path}, loading without it: {e}")
+        yield
+        return
+
+    with lock_file:
+        try:
+            # flock blocks until the building worker is done - keep the loop free meanwhile
+            await asyncio.to_thread(fcntl.flock, lock_file.fileno(), fcntl.LOCK_EX)
+        except OSError as e:
+            logger.warning(f"Cannot lock cache snapshot {path}, loading without it: {e}")
+            yield
+            return
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def read_snapshot(path: str) -> Optional[Dict[str, Any]]:
+    """Decode the snapshot at `path`, or None if it is missing or unreadable
+
+    The file is memory-mapped and decoded in place rather than read into a
+    bytes copy first.
+    """
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            return bson.decode(buf)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable cache snapshot {path}: {e}")
+        return None
+
+
+def write_snapshot(path: str, data: Dict[str, Any]) -> None:
+    """Encode `data` as one BSON document at `path`
+
+    Written to a temporary file and renamed over `path`, so readers only ever
+    see a complete snapshot - a crash mid-write leaves the old one in place.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(bson.encode(data))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
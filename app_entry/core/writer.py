@@ -0,0 +1,108 @@
+# ============================================================================
+# FILE: app_entry/core/writer.py
+# ============================================================================
+"""Background writer - batches non-critical Mongo writes off the request path"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import InsertOne
+from pymongo.asynchronous.collection import AsyncCollection
+
+logger = logging.getLogger(__name__)
+
+# Queued by stop() so the consumer flushes what is left and exits
+_STOP = object()
+
+
+class BackgroundWriter:
+    """Queue of bulk-write operations drained by a single background task
+
+    Endpoints enqueue operations (pymongo UpdateOne/InsertOne, ...) instead of
+    awaiting each write. The consumer collects up to `batch_size` operations or
+    waits up to `flush_interval_ms`, then issues one bulk_write per collection,
+    with the collections written concurrently so a batch costs a single round
+    trip.
+    """
+
+    def __init__(self, batch_size: int = 100, flush_interval_ms: int = 50, max_queue_size: int = 10000):
+        """Initialize writer; call start() from the running event loop"""
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._task: Optional[asyncio.Task] = None
+
+        logger.debug("BackgroundWriter initialized")
+
+    async def start(self) -> None:
+        """Spawn the consumer task"""
+        self._task = asyncio.create_task(self._run())
+        logger.info("✓ Background writer started")
+
+    async def stop(self) -> None:
+        """Flush everything queued so far, then stop the consumer"""
+        if self._task is None:
+            return
+        await self.queue.put(_STOP)
+        await self._task
+        self._task = None
+        logger.info("✓ Background writer drained and stopped")
+
+    async def submit(self, collection: AsyncCollection, operation: Any) -> None:
+        """Enqueue a write; only waits if the queue is full"""
+        await self.queue.put((collection, operation))
+
+    async def _run(self) -> None:
+        """Consumer loop: gather a batch, flush it, repeat until stopped"""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self.queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[AsyncCollection, Any]]) -> None:
+        """Issue one bulk_write per collection for the batch, all concurrently"""
+        grouped: Dict[str, List[Any]] = defaultdict(list)
+        collections: Dict[str, AsyncCollection] = {}
+        for collection, operation in batch:
+            grouped[collection.full_name].append(operation)
+            collections[collection.full_name] = collection
+
+        await asyncio.gather(*[
+            self._bulk_write(collections[name], operations)
+            for name, operations in grouped.items()
+        ])
+
+    async def _bulk_write(self, collection: AsyncCollection, operations: List[Any]) -> None:
+        """Write one collection's operations, logging rather than raising on failure
+
+        Insert-only batches go unordered so one bad document doesn't drop the
+        rest; batches with updates stay ordered so upserts on the same key apply
+        in submission order rather than racing into duplicates.
+        """
+        ordered = not all(isinstance(op, InsertOne) for op in operations)
+        try:
+            await collection.bulk_write(operations, ordered=ordered)
+            logger.debug("Flushed %d writes to %s", len(operations), collection.full_name)
+        except Exception as e:
+            logger.error(f"Failed to flush {len(operations)} writes to {collection.full_name}: {e}")
@@ -3,7 +3,7 @@
 # ============================================================================
 """Education-related schemas"""
 
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 from typing import List, Dict, Optional, Union
 from enum import Enum
 
@@ -19,6 +19,12 @@ class SubjectGrade(BaseModel):
     subject: str = Field(..., min_length=1)
     grade: str = Field(..., min_length=1, max_length=2)
     
+    @field_validator('subject')
+    @classmethod
+    def lowercase_subject(cls, v):
+        """Normalise subject names once at validation - matching is case-insensitive"""
+        return v.lower()
+    
     class Config:
         example = {"subject": "mathematics", "grade": "A"}
 
@@ -87,6 +93,9 @@ class CourseCheckRequest(BaseModel):
 
 class Programme(BaseModel):
     """Course/Programme information"""
+    # Built once per cache refresh and shared by every request - read-only
+    model_config = ConfigDict(frozen=True)
+    
     institution_name: str
     programme_name: str
     programme_code: Optional[Union[str, int]] = None
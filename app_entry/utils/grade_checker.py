@@ -3,13 +3,22 @@
 # ============================================================================
 """Grade checking and programme matching logic with education type support"""
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import logging
+import sys
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
 # Import EducationType from schemas to avoid duplication
 from app_entry.schemas.education import EducationType
+from app_entry.utils.programme_index import ProgrammeIndex
+
+# (alternative subject names, required grade points)
+SubjectRequirement = Tuple[Tuple[str, ...], int]
+# (cut_off_points, minimum grade points, subject requirements)
+CompiledRequirements = Tuple[Optional[float], int, Tuple[SubjectRequirement, ...]]
 
 class GradeChecker:
     """Handles grade validation and programme matching with multi-step qualification"""
@@ -29,155 +38,105 @@ class GradeChecker:
         """Initialize with user's grades and education type"""
         self.user_grades = user_grades
         self.education_type = education_type
+        self._is_degree = education_type == EducationType.DEGREE
         self.cluster_weights = cluster_weights or {}
-        logger.debug(f"GradeChecker initialized: type={education_type}, grades={len(user_grades)}, clusters={len(self.cluster_weights)}")
-    
-    def check_programme_requirements(
-        self,
-        programme: Dict[str, Any],
-        user_min_grade: str,
-        cluster_number: Optional[str] = None
-    ) -> bool:
-        """Check if user qualifies for a programme (multi-step validation)"""
-        prog_name = programme.get('programme_name', 'Unknown')
-        
-        try:
-            # STEP 1: Cut-off points check (DEGREES ONLY)
-            if self.education_type == EducationType.DEGREE:
-                if not self._check_cutoff_points(programme, cluster_number):
-                    return False
-            
-            # STEP 2: Minimum grade check
-            if not self._check_minimum_grade(programme, user_min_grade):
-                return False
-            
-            # STEP 3: Subject requirements check
-            if not self._check_subjects(programme.get("minimum_subject_requirements", {})):
-                return False
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error checking {prog_name}: {e}", exc_info=True)
-            return False
+
+        # Normalise the user's grades once per request: subject -> grade points
+        self._grades: Dict[str, int] = {}
+        for subject, grade in user_grades.items():
+            if not isinstance(subject, str) or not isinstance(grade, str):
+                continue
+            key = sys.intern(subject.lower().strip())
+            self._grades[key] = max(self._grades.get(key, 0), self._grade_value(grade))
+
+        # Best points per alternatives group - the same groups recur across clusters
+        self._group_points: Dict[Tuple[str, ...], int] = {}
+
+        logger.debug("GradeChecker initialized: type=%s, grades=%d, clusters=%d", education_type, len(user_grades), len(self.cluster_weights))
     
-    def _check_cutoff_points(self, programme: Dict[str, Any], cluster_number: Optional[str]) -> bool:
-        """Check cut-off points qualification (degrees only)"""
-        if self.education_type != EducationType.DEGREE or not cluster_number:
-            return True
-        
-        try:
-            prog_cutoff = programme.get("cut_off_points")
-            
-            # If no cutoff requirement, user qualifies
-            if prog_cutoff is None or prog_cutoff == "":
-                return True
-            
-            # Get the cluster key (e.g., "cl1" from "1")
-            cluster_key = f"cl{cluster_number}"
-            user_weight = self.cluster_weights.get(cluster_key, 0.0)
-            
-            # Convert to float for comparison
+    @classmethod
+    def compile_requirements(cls, programme: Dict[str, Any]) -> CompiledRequirements:
+        """Parse a programme's requirements into (cut_off, min_grade_points, subject_reqs)
+
+        Done once per programme at cache-load time so the per-request check is just
+        integer comparisons. subject_reqs is a tuple of (alternatives, grade_points)
+        where alternatives are the lowercased subject names of e.g. "ENG/KIS".
+        """
+        # Cut-off points (only applied to degrees)
+        cutoff: Optional[float] = None
+        prog_cutoff = programme.get("cut_off_points")
+        if prog_cutoff is not None and prog_cutoff != "":
             try:
-                prog_cutoff = float(prog_cutoff)
+                cutoff = float(prog_cutoff)
             except (TypeError, ValueError):
                 logger.warning(f"Invalid cut_off_points: {prog_cutoff}")
-                return True
-            
-            return user_weight >= prog_cutoff
-            
-        except Exception as e:
-            logger.error(f"Error checking cut-off points: {e}")
-            return False
-    
-    def _check_minimum_grade(self, programme: Dict[str, Any], user_grade: str) -> bool:
-        """Check minimum grade requirement"""
-        try:
-            prog_min_grade = programme.get("minimum_grade")
-            
-            if prog_min_grade is None or prog_min_grade == "":
-                return True
-            
-            # Extract the actual grade value
-            if isinstance(prog_min_grade, dict):
-                grade_value = prog_min_grade.get("mean_grade")
-                if not grade_value:
-                    return True
-            else:
-                grade_value = prog_min_grade
-            
-            # Compare grades
-            user_grade_val = self._grade_value(user_grade)
-            prog_grade_val = self._grade_value(str(grade_value))
-            
-            return user_grade_val >= prog_grade_val
-            
-        except Exception as e:
-            logger.error(f"Error checking minimum grade: {e}")
-            return False
-    
-    def _check_subjects(self, requirements: Dict[str, str]) -> bool:
-        """Verify user has all required subjects with required grades"""
-        try:
-            if not requirements or not isinstance(requirements, dict):
-                return True
-            
+
+        # Minimum grade - 0 means no requirement
+        min_points = 0
+        prog_min_grade = programme.get("minimum_grade")
+        if isinstance(prog_min_grade, dict):
+            prog_min_grade = prog_min_grade.get("mean_grade")
+        if prog_min_grade is not None and prog_min_grade != "":
+            min_points = cls._grade_value(str(prog_min_grade))
+
+        # Subject requirements, with alternatives (e.g. "ENG/KIS") pre-split and
+        # interned so the catalogue shares one string per subject name
+        subject_reqs = []
+        requirements = programme.get("minimum_subject_requirements", {})
+        if requirements and isinstance(requirements, dict):
             for req_subject, req_grade in requirements.items():
                 if not req_subject or not isinstance(req_subject, str):
                     continue
                 if not req_grade or not isinstance(req_grade, str):
                     continue
-                
-                # Handle subject alternatives (e.g., "ENG/KIS" or "Math/Statistics")
-                if "/" in req_subject:
-                    subjects = [s.strip() for s in req_subject.split("/")]
-                    found = any(
-                        self._user_has_subject(s, req_grade)
-                        for s in subjects
-                    )
-                    if not found:
-                        return False
-                else:
-                    if not self._user_has_subject(req_subject, req_grade):
-                        return False
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error checking subjects: {e}")
-            return False
+                alternatives = tuple(sys.intern(s.strip().lower()) for s in req_subject.split("/"))
+                subject_reqs.append((alternatives, cls._grade_value(req_grade)))
+
+        return cutoff, min_points, tuple(subject_reqs)
     
-    def _user_has_subject(self, subject: str, required_grade: str) -> bool:
-        """Check if user has subject with required grade"""
-        try:
-            if not isinstance(subject, str) or not isinstance(required_grade, str):
-                return False
-            
-            subject_lower = subject.lower().strip()
-            required_grade_val = self._grade_value(required_grade)
-            
-            for user_subject, user_grade in self.user_grades.items():
-                if not isinstance(user_subject, str) or not isinstance(user_grade, str):
-                    continue
-                
-                user_subject_lower = user_subject.lower().strip()
-                
-                if subject_lower in user_subject_lower or user_subject_lower in subject_lower:
-                    user_grade_val = self._grade_value(user_grade)
-                    qualified = user_grade_val >= required_grade_val
-                    if qualified:
-                        return True
-            
-            return False
-            
-        except Exception as e:
-            logger.error(f"Error checking user subject: {e}")
-            return False
+    def check_index(
+        self,
+        index: ProgrammeIndex,
+        user_min_grade: str,
+        cluster_number: Optional[str] = None
+    ) -> np.ndarray:
+        """Check the user against every programme of a cluster/category at once
+
+        Returns the row indices into index.programmes the user qualifies for.
+        """
+        user_weight = None
+        if self._is_degree and cluster_number:
+            user_weight = self.cluster_weights.get(f"cl{cluster_number}", 0.0)
+
+        user_vec = np.fromiter(
+            (self._cached_subject_points(alternatives) for alternatives in index.groups),
+            dtype=np.int8,
+            count=len(index.groups)
+        )
+        return index.match(self._grade_value(user_min_grade), user_vec, user_weight)
+    
+    def _cached_subject_points(self, alternatives: Tuple[str, ...]) -> int:
+        """_subject_points, computed once per request for each alternatives group"""
+        points = self._group_points.get(alternatives)
+        if points is None:
+            points = self._group_points[alternatives] = self._subject_points(alternatives)
+        return points
+    
+    def _subject_points(self, alternatives: Tuple[str, ...]) -> int:
+        """Best grade points the user holds for any of the alternatives, -1 if none"""
+        best = -1
+        for subject in alternatives:
+            for user_subject, user_points in self._grades.items():
+                if subject in user_subject or user_subject in subject:
+                    if user_points > best:
+                        best = user_points
+        return best
     
-    def _grade_value(self, grade: str) -> int:
+    @classmethod
+    def _grade_value(cls, grade: str) -> int:
         """Get numeric value of grade for comparison"""
         if not isinstance(grade, str):
             return 0
         
         grade_clean = grade.strip().upper()
-        return self.GRADE_POINTS.get(grade_clean, 0)
\ No newline at end of file
+        return cls.GRADE_POINTS.get(grade_clean, 0)
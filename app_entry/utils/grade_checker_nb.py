@@ -0,0 +1,66 @@
+# ============================================================================
+# FILE: app_entry/utils/grade_checker_nb.py
+# ============================================================================
+"""Optional Numba kernel for filtering a ProgrammeIndex"""
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover - numba is optional
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Stand-in decorator so the kernel stays importable as plain Python"""
+        def wrap(func):
+            return func
+        return wrap
+
+
+@njit(cache=True, boundscheck=False)
+def filter_cluster(user_min, user_vec, user_weight, check_min, check_cutoff, arr_min, arr_cutoff, arr_req):
+    """Return row indices of programmes the user qualifies for
+
+    Same rules as ProgrammeIndex.match: a row passes when (if check_min) its
+    minimum grade is met, (if check_cutoff) user_weight >= its cut-off - a
+    NaN cut-off is never met - and every subject column is met. Columns with
+    no requirement hold -1, which any user value (-1 when the user lacks the
+    subject) satisfies.
+    """
+    n, k = arr_req.shape
+    out = np.empty(n, np.int64)
+    m = 0
+    for i in range(n):
+        if check_min and user_min < arr_min[i]:
+            continue
+        if check_cutoff and not user_weight >= arr_cutoff[i]:
+            continue
+        ok = True
+        for j in range(k):
+            if user_vec[j] < arr_req[i, j]:
+                ok = False
+                break
+        if ok:
+            out[m] = i
+            m += 1
+    return out[:m]
+
+
+def warm_up() -> None:
+    """Compile (or load from the on-disk cache) filter_cluster before the first request
+
+    Arguments mirror ProgrammeIndex.match so the warm signature is the one
+    requests use.
+    """
+    if not NUMBA_AVAILABLE:
+        return
+    filter_cluster(
+        0, np.zeros(1, np.int8), 0.0, True, True,
+        np.zeros(1, np.int8), np.zeros(1, np.float64), np.zeros((1, 1), np.int8)
+    )
+    logger.info("✓ Numba filter kernel ready")
@@ -0,0 +1,136 @@
+# ============================================================================
+# FILE: app_entry/utils/programme_index.py
+# ============================================================================
+"""Structure-of-arrays view of a cluster/category for vectorised filtering"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from app_entry.utils.grade_checker_nb import NUMBA_AVAILABLE, filter_cluster
+
+logger = logging.getLogger(__name__)
+
+# Requirement cell meaning "no requirement for this subject group"
+NO_REQUIREMENT = -1
+
+# SWAR packing: 8 subject groups per uint64, one byte lane each. Lanes hold
+# points + 1 (0..13), so setting every lane's high bit before subtracting can
+# never borrow across lanes and the high bit survives only where user >= req.
+LANES_PER_WORD = 8
+HIGH_BITS = np.uint64(0x8080808080808080)
+
+
+def pack_lanes(points: np.ndarray) -> np.ndarray:
+    """Pack int8 grade points (..., groups) into uint64 words (..., ceil(groups / 8))"""
+    groups = points.shape[-1]
+    words = -(-groups // LANES_PER_WORD)
+    lanes = np.zeros(points.shape[:-1] + (words * LANES_PER_WORD,), dtype=np.uint8)
+    lanes[..., :groups] = points + 1
+    return lanes.view(np.uint64)
+
+
+class ProgrammeIndex:
+    """Requirement columns for one cluster/category, built once per cache refresh
+
+    Each programme is a row. Subject requirements become one int8 column per
+    distinct alternatives group (e.g. ("eng", "kis")) holding the required grade
+    points, or NO_REQUIREMENT, and is also packed into uint64 words so a row's
+    subject check is one SWAR compare per 8 groups. A user is then matched
+    against the whole cluster with a few NumPy ops instead of a Python loop.
+
+    Rows are stored sorted by minimum grade - or, with by_cutoff (degree
+    clusters, where the cut-off is the selective check), by cut-off - so that
+    check is a binary search that cuts the candidates down to a prefix;
+    `order` maps stored rows back to positions in `programmes`.
+    """
+
+    def __init__(self, programmes: List[Dict[str, Any]], by_cutoff: bool = False):
+        """Build the arrays from programmes carrying precompiled `_reqs`"""
+        self.programmes = programmes
+        self.by_cutoff = by_cutoff
+        reqs = [p["_reqs"] for p in programmes]
+        n = len(reqs)
+
+        # No cut-off is -inf so every weight meets it; a NaN cut-off stays NaN
+        # and no weight meets it
+        self.cutoffs = np.array(
+            [-np.inf if cutoff is None else cutoff for cutoff, _, _ in reqs],
+            dtype=np.float64
+        )
+        self.min_points = np.fromiter((m for _, m, _ in reqs), dtype=np.int8, count=n)
+
+        # One column per distinct group of alternative subjects
+        groups: Dict[Tuple[str, ...], int] = {}
+        for _, _, subject_reqs in reqs:
+            for alternatives, _ in subject_reqs:
+                groups.setdefault(alternatives, len(groups))
+        self.groups: Tuple[Tuple[str, ...], ...] = tuple(groups)
+
+        self.req_matrix = np.full((n, len(groups)), NO_REQUIREMENT, dtype=np.int8)
+        for i, (_, _, subject_reqs) in enumerate(reqs):
+            for alternatives, points in subject_reqs:
+                j = groups[alternatives]
+                # The same group listed twice must satisfy the stricter grade
+                self.req_matrix[i, j] = max(self.req_matrix[i, j], points)
+
+        # Sort rows on the prefix key (stable, so ties keep their cluster order;
+        # NaN cut-offs sort last, past any weight searchsorted can look for)
+        self.order = np.argsort(self.cutoffs if by_cutoff else self.min_points, kind="stable")
+        self.cutoffs = self.cutoffs[self.order]
+        self.min_points = self.min_points[self.order]
+        self.req_matrix = self.req_matrix[self.order]
+
+        self.req_words = pack_lanes(self.req_matrix)
+
+        # No programme has a cut-off, minimum grade or subject requirement
+        self.is_open = not self.groups and not self.min_points.any() and bool(np.isneginf(self.cutoffs).all())
+
+    def __len__(self) -> int:
+        return len(self.programmes)
+
+    def match(self, user_min: int, user_vec: np.ndarray, user_weight: Optional[float] = None) -> np.ndarray:
+        """Return indices into `programmes` the user qualifies for, in cluster order
+
+        Args:
+            user_min: User's overall grade points
+            user_vec: User's best grade points per column of `groups` (-1 if absent)
+            user_weight: User's cluster weight, or None to skip the cut-off check
+        """
+        # Open clusters (e.g. no requirements recorded) - every programme qualifies
+        if self.is_open:
+            return np.arange(len(self))
+
+        check_cutoff = user_weight is not None
+        # A NaN weight meets no cut-off, but still every "no cut-off" row
+        weight = -np.inf if not check_cutoff or np.isnan(user_weight) else float(user_weight)
+
+        # Only the prefix of rows whose sort key the user meets can pass
+        if self.by_cutoff:
+            k = int(np.searchsorted(self.cutoffs, weight, side="right")) if check_cutoff else len(self)
+            check_min, check_cutoff = True, False
+        else:
+            k = int(np.searchsorted(self.min_points, user_min, side="right"))
+            check_min = False
+        if k == 0:
+            return self.order[:0]
+
+        if NUMBA_AVAILABLE:
+            rows = filter_cluster(
+                user_min, user_vec, weight, check_min, check_cutoff,
+                self.min_points[:k], self.cutoffs[:k], self.req_matrix[:k]
+            )
+        else:
+            mask = np.ones(k, dtype=bool)
+            if check_min:
+                mask &= self.min_points[:k] <= user_min
+            if check_cutoff:
+                mask &= weight >= self.cutoffs[:k]
+            if self.groups:
+                user_words = pack_lanes(user_vec)
+                lanes_ok = ((user_words | HIGH_BITS) - self.req_words[:k]) & HIGH_BITS
+                mask &= (lanes_ok == HIGH_BITS).all(axis=1)
+            rows = np.flatnonzero(mask)
+
+        return np.sort(self.order[rows])
@@ -4,36 +4,47 @@
 # ============================================================================
 """Input validation utilities"""
 
-from typing import List, Tuple
-from app_entry.schemas.education import SubjectGrade
+from functools import lru_cache
+from operator import attrgetter
+from typing import Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
-VALID_GRADES = {'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D+', 'D', 'D-', 'E'}
+VALID_GRADES = frozenset({'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D+', 'D', 'D-', 'E'})
+VALID_GRADES_TEXT = ', '.join(sorted(VALID_GRADES))
 
-def validate_subjects(subjects: List[SubjectGrade]) -> Tuple[bool, str]:
-    """Validate subject input
+MAX_SUBJECTS = 15
+
+# (subject, grade) pairs of one request - the hashable form used as cache key
+SubjectPairs = Tuple[Tuple[str, str], ...]
+
+# SubjectGrade -> (subject, grade), in C rather than a per-item Python tuple build
+subject_pair = attrgetter("subject", "grade")
+
+@lru_cache(maxsize=4096)
+def validate_subject_pairs(pairs: SubjectPairs) -> Tuple[bool, str]:
+    """Validate (subject, grade) pairs, memoised per distinct payload
     
     Args:
-        subjects: List of SubjectGrade objects
+        pairs: Tuple of (subject, grade) tuples
         
     Returns:
         Tuple of (is_valid, error_message)
     """
-    if not subjects:
+    if not pairs:
         return False, "At least one subject is required"
     
-    if len(subjects) > 15:
-        return False, "Maximum 15 subjects allowed"
+    if len(pairs) > MAX_SUBJECTS:
+        return False, f"Maximum {MAX_SUBJECTS} subjects allowed"
     
-    for subject in subjects:
-        if subject.grade not in VALID_GRADES:
-            error_msg = f"Invalid grade: {subject.grade}. Valid grades are: {', '.join(sorted(VALID_GRADES))}"
+    for _, grade in pairs:
+        if grade not in VALID_GRADES:
+            error_msg = f"Invalid grade: {grade}. Valid grades are: {VALID_GRADES_TEXT}"
             logger.warning(error_msg)
             return False, error_msg
     
-    logger.debug(f"Validated {len(subjects)} subjects successfully")
+    logger.debug("Validated %d subjects successfully", len(pairs))
     return True, ""
 
 def validate_index_number(index_number: str) -> Tuple[bool, str]:
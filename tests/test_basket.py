@@ -0,0 +1,51 @@
+"""add_to_basket keeps user-supplied values out of field-path position"""
+
+import asyncio
+
+from pymongo.results import UpdateResult
+
+from app_entry.api.endpoints.courses import AddToBasketRequest, add_to_basket
+
+
+class FakeCollection:
+    """Records the update pipeline instead of running it"""
+
+    def __init__(self):
+        self.updates = []
+
+    async def update_one(self, filter, update, upsert=False):
+        self.updates.append(update)
+        return UpdateResult({"n": 1, "nModified": 1}, acknowledged=True)
+
+
+def unescaped_strings(expr):
+    """Every string in an aggregation expression that isn't inside $literal"""
+    if isinstance(expr, dict):
+        for key, value in expr.items():
+            if key != "$literal":
+                yield from unescaped_strings(value)
+    elif isinstance(expr, list):
+        for value in expr:
+            yield from unescaped_strings(value)
+    elif isinstance(expr, str):
+        yield expr
+
+
+def test_programme_code_starting_with_dollar_is_literal():
+    baskets = FakeCollection()
+    request = AddToBasketRequest(
+        email="student@example.com",
+        course={
+            "institution_name": "$institution",
+            "programme_name": "$name",
+            "programme_code": "$email",
+            "cluster_name": "$cluster",
+        },
+    )
+
+    response = asyncio.run(add_to_basket(request, db={"course_baskets": baskets}))
+
+    assert response["status"] == "success"
+    (pipeline,) = baskets.updates
+    strings = set(unescaped_strings(pipeline))
+    assert not strings & {"$email", "$institution", "$name", "$cluster"}
@@ -0,0 +1,81 @@
+"""The per-worker cluster weights cache against concurrent verify-cluster saves"""
+
+import asyncio
+
+import pytest
+
+from app_entry.api.endpoints import clusterWeight
+from app_entry.api.endpoints.clusterWeight import (
+    VerifyClusterPaymentRequest, get_user_cluster_weights, verify_cluster_payment
+)
+
+
+class FakeWeights:
+    """cluster_weights collection whose reads can be held until released"""
+
+    def __init__(self):
+        self.records = []
+        self.hold_reads = False
+        self.read_started = asyncio.Event()
+        self.release_read = asyncio.Event()
+
+    async def insert_one(self, record):
+        self.records.append(dict(record))
+        return type("Result", (), {"inserted_id": len(self.records)})()
+
+    async def find_one(self, filter, projection=None, sort=None):
+        matches = [r for r in self.records if r["email"] == filter["email"]]
+        latest = dict(matches[-1]) if matches else None
+        if self.hold_reads:
+            self.read_started.set()
+            await self.release_read.wait()
+        return latest
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(clusterWeight, "_cluster_cache", {})
+    monkeypatch.setattr(clusterWeight, "_cluster_versions", {})
+
+
+def verify_request(email, weight):
+    return VerifyClusterPaymentRequest(
+        reference=f"ref-{weight}",
+        email=email,
+        product="cluster_weight_calculator",
+        cluster_weights={f"cl{i}": weight for i in range(1, 21)},
+        kcse_overall="B+",
+    )
+
+
+def test_get_started_before_verify_does_not_cache_stale_weights():
+    async def scenario():
+        weights = FakeWeights()
+        db = {"cluster_weights": weights}
+        await verify_cluster_payment(verify_request("student@example.com", 30.0), db)
+        clusterWeight._cluster_cache.clear()
+
+        # A GET reads the old record, then a new save lands before it returns
+        weights.hold_reads = True
+        slow_get = asyncio.create_task(get_user_cluster_weights("student@example.com", db))
+        await weights.read_started.wait()
+        await verify_cluster_payment(verify_request("student@example.com", 40.0), db)
+        weights.release_read.set()
+        assert (await slow_get).cluster_weights["cl1"] == 30.0
+
+        weights.hold_reads = False
+        weights.records.clear()  # served from the cache, not the collection
+        return await get_user_cluster_weights("student@example.com", db)
+
+    assert asyncio.run(scenario()).cluster_weights["cl1"] == 40.0
+
+
+def test_verify_primes_the_entry_get_reads():
+    async def scenario():
+        weights = FakeWeights()
+        db = {"cluster_weights": weights}
+        await verify_cluster_payment(verify_request("Student@EXAMPLE.com", 35.0), db)
+        weights.records.clear()
+        return await get_user_cluster_weights("Student@EXAMPLE.com", db)
+
+    assert asyncio.run(scenario()).cluster_weights["cl20"] == 35.0
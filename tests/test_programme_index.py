@@ -0,0 +1,91 @@
+"""ProgrammeIndex.match against a per-programme scalar check on random catalogues"""
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from app_entry.utils import programme_index
+from app_entry.utils.programme_index import ProgrammeIndex
+
+# More than 8 groups, so requirements span several packed words
+GROUP_POOL = [
+    ("eng",), ("kis",), ("eng", "kis"), ("mat",), ("bio",), ("chem",), ("phy",),
+    ("geo", "his"), ("cre", "ire", "hre"), ("agr",), ("bst",), ("comp",),
+]
+
+
+def random_reqs(rng: random.Random, groups: int):
+    """Compiled (cut_off, min_points, subject_reqs) with repeats, NaN and missing cut-offs"""
+    cutoff = rng.choice([None, math.nan, rng.uniform(0, 48), float(rng.randint(0, 48))])
+    min_points = rng.choice([0, rng.randint(1, 12)])
+    subject_reqs = tuple(
+        (rng.choice(GROUP_POOL[:groups]), rng.randint(1, 12))
+        for _ in range(rng.randint(0, 4) if groups else 0)
+    )
+    return cutoff, min_points, subject_reqs
+
+
+def scalar_match(reqs, user_min, user_points, user_weight):
+    """Same rules as match, one programme at a time"""
+    cutoff, min_points, subject_reqs = reqs
+    if user_min < min_points:
+        return False
+    if user_weight is not None and cutoff is not None and not user_weight >= cutoff:
+        return False
+    return all(user_points.get(group, -1) >= points for group, points in subject_reqs)
+
+
+@pytest.fixture(params=[True, False], ids=["numba", "numpy"])
+def numba_available(request, monkeypatch):
+    """Run match through the filter_cluster kernel and through the NumPy/SWAR path"""
+    monkeypatch.setattr(programme_index, "NUMBA_AVAILABLE", request.param)
+    return request.param
+
+
+@pytest.mark.parametrize("by_cutoff", [False, True])
+@pytest.mark.parametrize("groups", [0, 3, len(GROUP_POOL)])
+@pytest.mark.parametrize("seed", range(10))
+def test_match_agrees_with_scalar_check(numba_available, by_cutoff, groups, seed):
+    rng = random.Random(seed)
+    programmes = [{"_reqs": random_reqs(rng, groups)} for _ in range(rng.randint(0, 60))]
+    index = ProgrammeIndex(programmes, by_cutoff=by_cutoff)
+
+    for _ in range(25):
+        user_min = rng.randint(0, 12)
+        user_points = {group: rng.randint(-1, 12) for group in GROUP_POOL}
+        user_weight = rng.choice([None, math.nan, 0.0, rng.uniform(0, 48)])
+        user_vec = np.array([user_points[group] for group in index.groups], dtype=np.int8)
+
+        expected = [
+            i for i, p in enumerate(programmes)
+            if scalar_match(p["_reqs"], user_min, user_points, user_weight)
+        ]
+        assert index.match(user_min, user_vec, user_weight).tolist() == expected
+
+
+@pytest.mark.parametrize("by_cutoff", [False, True])
+def test_duplicate_group_must_meet_the_stricter_grade(numba_available, by_cutoff):
+    index = ProgrammeIndex([{"_reqs": (None, 0, ((("mat",), 6), (("mat",), 9)))}], by_cutoff=by_cutoff)
+
+    assert index.match(12, np.array([8], dtype=np.int8)).tolist() == []
+    assert index.match(12, np.array([9], dtype=np.int8)).tolist() == [0]
+
+
+@pytest.mark.parametrize("by_cutoff", [False, True])
+def test_nan_weight_meets_only_programmes_without_cut_off(numba_available, by_cutoff):
+    programmes = [{"_reqs": (30.0, 0, ())}, {"_reqs": (None, 0, ())}, {"_reqs": (math.nan, 0, ())}]
+    index = ProgrammeIndex(programmes, by_cutoff=by_cutoff)
+
+    assert index.match(12, np.zeros(0, dtype=np.int8), math.nan).tolist() == [1]
+    assert index.match(12, np.zeros(0, dtype=np.int8), 48.0).tolist() == [0, 1]
+    assert index.match(12, np.zeros(0, dtype=np.int8)).tolist() == [0, 1, 2]
+
+
+def test_open_cluster_matches_every_programme(numba_available):
+    index = ProgrammeIndex([{"_reqs": (None, 0, ())}] * 3)
+
+    assert index.is_open
+    assert index.match(0, np.zeros(0, dtype=np.int8), math.nan).tolist() == [0, 1, 2]
+    assert ProgrammeIndex([]).match(0, np.zeros(0, dtype=np.int8)).tolist() == []